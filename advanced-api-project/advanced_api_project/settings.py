@@ -56,6 +56,14 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+STREAM_CHUNK_SIZE = 500  # Rows fetched and serialized per chunk of a streamed list response
+COMPILED_SERIALIZERS = True  # Serialize the streamed book list through api/compiled.py
+
+# Response cache for read-mostly endpoints (api/response_cache.py)
+RESPONSE_CACHE_TTL = {'book-list': 300}  # Seconds per endpoint name; 0 disables caching
+RESPONSE_CACHE_LOCK_TIMEOUT = 30  # Seconds concurrent misses wait for the request filling the entry
+RESPONSE_CACHE_MAX_SIZE = 5 * 1024 * 1024  # Larger bodies (big exports) are streamed but not cached
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -0,0 +1,110 @@
+"""
+Compiled read serializers for the book catalog.
+
+`compile_serializer(BookSerializer)` reads the serializer's fields once and
+derives a flat `values()` fetch of the columns they read plus a mapping from
+each row to the output dict. Every value still goes through its field's
+`to_representation`, so the output is the same as `Serializer(many=True)`
+without building a model instance per row. Nested list serializers over a
+reverse foreign key (an author's books) cost one more `values()` query per
+batch of rows. Other fields (method fields, many-to-many, nested objects)
+raise ImproperlyConfigured when compiling.
+
+`COMPILED_SERIALIZERS = False` switches the book list back to BookSerializer.
+"""
+import functools
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import relations, serializers
+
+
+class _Value:
+    load = None
+
+    def __init__(self, field, path, pk_only=False):
+        self.field, self.path, self.pk_only = field, path, pk_only
+        self.paths = [path]
+
+    def value(self, row, loaded):
+        value = row[self.path]
+        if value is None:
+            return None
+        if self.pk_only:
+            value = relations.PKOnlyObject(pk=value)
+        return self.field.to_representation(value)
+
+
+class _Nested:
+    def __init__(self, field, relation, model):
+        self.pk = model._meta.pk.name
+        self.paths = [self.pk]
+        self.foreign_key = relation.field.name
+        self.child = CompiledSerializer(field.child, extra=[self.foreign_key])
+
+    def load(self, rows):
+        grouped = {row[self.pk]: [] for row in rows}
+        if grouped:
+            model = self.child.model
+            queryset = model._default_manager.filter(**{f'{self.foreign_key}__in': list(grouped)})
+            children = list(self.child.values(queryset.order_by(*(model._meta.ordering or ['pk']))))
+            for child, data in zip(children, self.child.serialize(children)):
+                grouped[child[self.foreign_key]].append(data)
+        return grouped
+
+    def value(self, row, loaded):
+        return loaded[row[self.pk]]
+
+
+def _compile_field(field, model):
+    try:
+        model_field = model._meta.get_field(field.source) if len(field.source_attrs) == 1 else None
+    except FieldDoesNotExist:
+        model_field = None
+    if model_field is not None:
+        if isinstance(field, serializers.ListSerializer):
+            if model_field.one_to_many and isinstance(field.child, serializers.ModelSerializer):
+                return _Nested(field, model_field, model)
+        elif isinstance(field, serializers.BaseSerializer) or isinstance(field, relations.ManyRelatedField):
+            pass
+        elif not model_field.is_relation:
+            return _Value(field, model_field.name)
+        elif model_field.many_to_one and isinstance(field, relations.RelatedField) and field.use_pk_only_optimization():
+            return _Value(field, model_field.name, pk_only=True)
+    raise ImproperlyConfigured(
+        f'Cannot compile {type(field).__name__} {field.field_name!r} of {model.__name__}: it needs model instances'
+    )
+
+
+class CompiledSerializer:
+    """
+    The read side of a ModelSerializer: `serialize(compiled.values(queryset))`
+    returns the same list as `Serializer(queryset, many=True).data`.
+    """
+
+    def __init__(self, serializer, extra=()):
+        if isinstance(serializer, type):
+            serializer = serializer()
+        self.model = serializer.Meta.model
+        self.fields = [(field.field_name, _compile_field(field, self.model)) for field in serializer._readable_fields]
+        paths = [self.model._meta.pk.name, *extra]
+        for _, compiled in self.fields:
+            paths += compiled.paths
+        self.paths = list(dict.fromkeys(paths))
+
+    def values(self, queryset):
+        return queryset.values(*self.paths)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        loaded = {name: compiled.load(rows) for name, compiled in self.fields if compiled.load}
+        return [{name: compiled.value(row, loaded.get(name)) for name, compiled in self.fields} for row in rows]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
+
+
+def compiled_serializers_enabled():
+    return getattr(settings, 'COMPILED_SERIALIZERS', True)
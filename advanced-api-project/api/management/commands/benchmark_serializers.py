@@ -0,0 +1,69 @@
+"""
+Django Management Command to benchmark compiled read serializers
+Serializes the same books and authors through BookSerializer/AuthorSerializer
+and through their compiled `values()` form (api/compiled.py), and reports the
+time per 10k rows of each. The outputs are compared, so a mismatch fails the
+run. Synthetic data is created inside a transaction that is rolled back, so
+the database is left untouched.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from api.compiled import compile_serializer
+from api.models import Author, Book
+from api.serializers import AuthorSerializer, BookSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare serialization throughput of the book serializers and their compiled form'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Books and authors to serialize')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best one is reported')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        rows = options['rows']
+        self.stdout.write(f'Seeding {rows} synthetic authors with one book each...')
+        authors = Author.objects.bulk_create([Author(name=f'Author {i}') for i in range(rows)], batch_size=5000)
+        Book.objects.bulk_create([
+            Book(title=f'Book {author.pk}', publication_year=1900 + author.pk % 120, author=author)
+            for author in authors
+        ], batch_size=5000)
+
+        books = Book.objects.order_by('id')
+        cases = (
+            ('BookSerializer', BookSerializer, books, books),
+            ('AuthorSerializer', AuthorSerializer, Author.objects.order_by('id'),
+             Author.objects.order_by('id').prefetch_related(Prefetch('books', queryset=books))),
+        )
+        for label, serializer_class, queryset, instances in cases:
+            compiled = compile_serializer(serializer_class)
+            plain_time, plain = self.measure(lambda: serializer_class(instances, many=True).data, options['repeat'])
+            compiled_time, fast = self.measure(lambda: compiled.serialize(compiled.values(queryset)),
+                                               options['repeat'])
+            if JSONRenderer().render(plain) != JSONRenderer().render(fast):
+                raise CommandError(f'{label}: the compiled output differs')
+            per_10k = 10000 / max(len(plain), 1)
+            self.stdout.write(
+                f'{label:>16}: serializer {plain_time * per_10k:.2f}s, compiled {compiled_time * per_10k:.2f}s '
+                f'per 10k rows ({plain_time / compiled_time:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Compiled serializers produced identical output'))
+
+    def measure(self, serialize, repeat):
+        best, data = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
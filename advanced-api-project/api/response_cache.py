@@ -0,0 +1,208 @@
+"""
+Response cache for read-mostly list endpoints.
+
+The book catalog barely changes, yet every combination of filters, search,
+ordering and page hits the database. `CachedResponseMixin` keeps the JSON
+body of GET responses in the default cache, keyed by:
+
+* the endpoint name (`response_cache_name`),
+* the versions of the models the response reads (`response_cache_models`),
+  bumped by api/signals.py whenever one of their rows is saved or deleted,
+* the scheme and host (pagination links are absolute URLs) and the
+  normalized query string: parameters sorted by name, so
+  `?ordering=title&page=2` and `?page=2&ordering=title` share an entry.
+
+Stale entries are never deleted; their keys just stop being read and they
+expire after the endpoint's TTL: `RESPONSE_CACHE_TTL[name]`, else the view's
+`response_cache_ttl` (0 disables caching). Bulk `update()`/`delete()` calls
+fire no signals, so code using them must call `invalidate()` itself.
+
+On a miss only one request fills the entry (single-flight): it takes a lock
+with `cache.add`, and concurrent requests for the same key poll for the
+entry for up to `RESPONSE_CACHE_LOCK_TIMEOUT` seconds instead of all running
+the same query. Streamed responses are passed through while being recorded;
+bodies over `RESPONSE_CACHE_MAX_SIZE` bytes (large exports) are not kept.
+Hits and misses per endpoint are counted in the cache, see `stats()` and the
+`response-cache-stats` view. Only JSON is cached: the browsable API's HTML
+depends on the user.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+VERSION_KEY = 'api:response-version:{}'
+RESPONSE_KEY = 'api:response:{name}:{versions}:{query}'
+LOCK_KEY = 'api:response-lock:{}'
+STAT_KEY = 'api:response-cache:{name}:{outcome}'
+OUTCOMES = ('hit', 'miss')
+POLL_INTERVAL = 0.05
+
+
+def _version(model):
+    key = VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        # The version key was evicted (or never set). Responses keyed with its
+        # old values may still be within their TTL, so restarting the count at
+        # a small number could hand out a catalog from before the last write;
+        # a clock reading is larger than any value the counter reached before.
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate(*models):
+    """Make every cached response reading `models` stale, now and once the transaction commits."""
+    def bump():
+        for model in models:
+            try:
+                cache.incr(VERSION_KEY.format(model._meta.label_lower))
+            except ValueError:
+                cache.set(VERSION_KEY.format(model._meta.label_lower), time.time_ns(), None)
+
+    bump()
+    # A miss between the first bump and the commit cannot see the new rows
+    # yet, but stores what it read under the bumped version. Bumping once
+    # more when the rows become visible orphans that entry.
+    transaction.on_commit(bump)
+
+
+def normalized_query(request):
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values if value != '')
+    return '&'.join(f'{key}={value}' for key, value in params)
+
+
+def _stat_keys(name):
+    return {outcome: STAT_KEY.format(name=name, outcome=outcome) for outcome in OUTCOMES}
+
+
+def _count(name, outcome):
+    key = _stat_keys(name)[outcome]
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:  # Evicted since add()
+            cache.add(key, 1, None)
+
+
+def stats(names):
+    """Hits, misses and hit rate of each endpoint in `names` since `reset_stats()`; rate is None before any GET."""
+    keys = {name: _stat_keys(name) for name in names}
+    counts = cache.get_many([key for per_outcome in keys.values() for key in per_outcome.values()])
+    result = {}
+    for name, per_outcome in keys.items():
+        hits, misses = (counts.get(per_outcome[outcome], 0) for outcome in OUTCOMES)
+        result[name] = {'hits': hits, 'misses': misses,
+                        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None}
+    return result
+
+
+def reset_stats(names):
+    cache.delete_many([key for name in names for key in _stat_keys(name).values()])
+
+
+def _cached_response(entry, outcome):
+    status, content_type, content = entry
+    response = HttpResponse(content, status=status, content_type=content_type)
+    response['X-Response-Cache'] = outcome
+    return response
+
+
+def _recording(chunks, store, release, limit):
+    """Pass a streamed body through, storing it once complete unless it outgrows `limit`."""
+    recorded, size = [], 0
+    try:
+        for chunk in chunks:
+            if recorded is not None:
+                size += len(chunk)
+                if size > limit:
+                    recorded = None
+                else:
+                    recorded.append(chunk)
+            yield chunk
+        if recorded is not None:
+            store(b''.join(recorded))
+    finally:
+        release()
+
+
+class CachedResponseMixin:
+    """
+    Cache a view's JSON GET responses (status 200) per normalized query
+    string. Views name the endpoint and the models the response reads.
+    Hooks `get`, so it also covers views that override `list`.
+    """
+    response_cache_name = None
+    response_cache_models = ()
+    response_cache_ttl = 60
+
+    @classmethod
+    def response_cache_timeout(cls):
+        return getattr(settings, 'RESPONSE_CACHE_TTL', {}).get(cls.response_cache_name, cls.response_cache_ttl)
+
+    def response_cache_key(self, request):
+        versions = '.'.join(str(_version(model)) for model in self.response_cache_models)
+        query = hashlib.md5(f"{request.build_absolute_uri('/')}?{normalized_query(request)}".encode()).hexdigest()
+        return RESPONSE_KEY.format(name=self.response_cache_name, versions=versions, query=query)
+
+    def get(self, request, *args, **kwargs):
+        self._response_cache_key = None
+        timeout = self.response_cache_timeout()
+        if not timeout or request.method != 'GET' or type(request.accepted_renderer) is not JSONRenderer:
+            return super().get(request, *args, **kwargs)
+        key = self.response_cache_key(request)
+        lock = LOCK_KEY.format(key)
+        entry = cache.get(key)
+        if entry is None and not cache.add(lock, 1, self.lock_timeout()):
+            # Another request is filling this entry: wait for it rather than repeat its queries
+            deadline = time.monotonic() + self.lock_timeout()
+            while entry is None and cache.get(lock) and time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                entry = cache.get(key)
+            if entry is None:
+                cache.add(lock, 1, self.lock_timeout())
+        if entry is not None:
+            _count(self.response_cache_name, 'hit')
+            return _cached_response(entry, 'hit')
+        _count(self.response_cache_name, 'miss')
+        self._response_cache_key = key
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key, self._response_cache_key = getattr(self, '_response_cache_key', None), None
+        if key is not None:
+            if response.status_code == 200:
+                self.record_response(response, key)
+            else:
+                cache.delete(LOCK_KEY.format(key))
+        return response
+
+    def lock_timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 30)
+
+    def record_response(self, response, key):
+        timeout = self.response_cache_timeout()
+        limit = getattr(settings, 'RESPONSE_CACHE_MAX_SIZE', 5 * 1024 * 1024)
+        content_type = response['Content-Type']
+
+        def store(content):
+            cache.set(key, (response.status_code, content_type, content), timeout)
+
+        response['X-Response-Cache'] = 'miss'
+        if response.streaming:
+            response.streaming_content = _recording(response.streaming_content, store,
+                                                    lambda: cache.delete(LOCK_KEY.format(key)), limit)
+        else:
+            def store_rendered(rendered):
+                if len(rendered.content) <= limit:
+                    store(rendered.content)
+                cache.delete(LOCK_KEY.format(key))
+
+            response.add_post_render_callback(store_rendered)
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import response_cache
+from .models import Author, Book
+
+
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_cached_responses(sender, **kwargs):
+    # Deleting an author cascades to its books, which send their own signals
+    response_cache.invalidate(sender)
@@ -0,0 +1,115 @@
+"""
+Streaming JSON for the book list.
+
+`Response(serializer.data)` holds every book, every serialized dict and the
+rendered bytes in memory at once, which adds up for catalog exports with a
+large `page_size`. `StreamingJSONResponse` reads the rows with
+`queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)` and sends each chunk as soon
+as it is serialized (by a serializer, or its compiled form from
+api/compiled.py), inside the usual count/next/previous/results envelope. The
+bytes are the same as JSONRenderer's. Other renderers (the browsable API) keep
+the normal Response.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from .compiled import CompiledSerializer
+
+RESULTS = object()  # Placeholder for the streamed list inside an envelope
+
+
+def wants_stream(request):
+    return type(request.accepted_renderer) is JSONRenderer
+
+
+def dumps(value):
+    """Encode like DRF's JSONRenderer (compact, unicode, strict floats)."""
+    encoded = json.dumps(
+        value, cls=encoders.JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS,
+    )
+    return encoded.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def iter_json(payload, serializer, rows, size):
+    item_separator, key_separator = SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS
+    if payload is not RESULTS:
+        yield '{'
+        for index, (key, value) in enumerate(payload.items()):
+            yield (item_separator if index else '') + dumps(key) + key_separator
+            if value is RESULTS:
+                yield from iter_json(RESULTS, serializer, rows, size)
+            else:
+                yield dumps(value)
+        yield '}'
+        return
+    if isinstance(rows, QuerySet):
+        rows = rows.iterator(chunk_size=size)
+    yield '['
+    pending, started = [], False
+    for instance in rows:
+        pending.append(instance)
+        if len(pending) >= size:
+            yield (item_separator if started else '') + encode_chunk(serializer, pending, item_separator)
+            pending, started = [], True
+    if pending:
+        yield (item_separator if started else '') + encode_chunk(serializer, pending, item_separator)
+    yield ']'
+
+
+def encode_chunk(serializer, rows, separator):
+    # Compiled serializers (api/compiled.py) take values() rows a chunk at a time
+    if isinstance(serializer, CompiledSerializer):
+        data = serializer.serialize(rows)
+    else:
+        data = [serializer.to_representation(instance) for instance in rows]
+    return separator.join(map(dumps, data))
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    def __init__(self, serializer, rows, payload=RESULTS, chunk_size=None, status=200):
+        size = chunk_size or getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+        super().__init__(iter_json(payload, serializer, rows, size), status=status, content_type='application/json')
+
+
+class StreamingPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination that leaves the page unevaluated, so a streamed
+    response can iterate it, and lets clients ask for bigger pages.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 10000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page.object_list
+
+    def get_paginated_data(self, data):
+        return {
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
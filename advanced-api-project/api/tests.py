@@ -1,13 +1,22 @@
 from django.test import TestCase
 
 # Create your tests here.
+import json
+
 from django.urls import reverse
 from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from .compiled import compile_serializer
 from .models import Author, Book
+from .serializers import AuthorSerializer, BookSerializer
 
 class BookAPITestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.author = Author.objects.create(name="Author 1")
         self.book = Book.objects.create(title="Book 1", publication_year=2020, author=self.author)
 
@@ -15,6 +24,13 @@ class BookAPITestCase(APITestCase):
         response = self.client.get(reverse('book-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_book_list_is_streamed(self):
+        response = self.client.get(reverse('book-list'), {'page_size': 50}, HTTP_ACCEPT='application/json')
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'], [{'id': self.book.pk, 'title': 'Book 1', 'publication_year': 2020, 'author': self.author.pk}])
+
     def test_book_detail(self):
         response = self.client.get(reverse('book-detail', kwargs={'pk': self.book.pk}))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -32,3 +48,48 @@ class BookAPITestCase(APITestCase):
     def test_delete_book(self):
         response = self.client.delete(reverse('book-delete', kwargs={'pk': self.book.pk}))
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_compiled_serializers_match(self):
+        Book.objects.create(title="Book \u2028 2", publication_year=2021, author=self.author)
+        Author.objects.create(name="Author without books")
+        for serializer_class, queryset in ((BookSerializer, Book.objects.order_by('id')),
+                                           (AuthorSerializer, Author.objects.order_by('id'))):
+            compiled = compile_serializer(serializer_class)
+            self.assertEqual(JSONRenderer().render(compiled.serialize(compiled.values(queryset))),
+                             JSONRenderer().render(serializer_class(queryset, many=True).data))
+
+        response = self.client.get(reverse('book-list'), HTTP_ACCEPT='application/json')
+        with override_settings(COMPILED_SERIALIZERS=False, RESPONSE_CACHE_TTL={'book-list': 0}):
+            expected = self.client.get(reverse('book-list'), HTTP_ACCEPT='application/json')
+        self.assertEqual(b''.join(response.streaming_content), b''.join(expected.streaming_content))
+
+    def test_book_list_is_cached_until_the_catalog_changes(self):
+        url = reverse('book-list')
+        first = self.client.get(url + '?ordering=title&page=1', HTTP_ACCEPT='application/json')
+        self.assertEqual(first['X-Response-Cache'], 'miss')
+        body = b''.join(first.streaming_content)
+        with self.assertNumQueries(0):
+            second = self.client.get(url + '?page=1&ordering=title', HTTP_ACCEPT='application/json')
+        self.assertEqual(second['X-Response-Cache'], 'hit')
+        self.assertEqual(second.content, body)
+
+        self.author.name = "Renamed"
+        self.author.save()
+        third = self.client.get(url + '?ordering=title&page=1', HTTP_ACCEPT='application/json')
+        self.assertEqual(third['X-Response-Cache'], 'miss')
+        self.assertIn(b'"count":1', b''.join(third.streaming_content))
+
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+        stats = self.client.get(reverse('response-cache-stats')).data['book-list']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_cached_links_keep_the_request_scheme(self):
+        Book.objects.create(title="Book 2", publication_year=2021, author=self.author)
+        url = reverse('book-list') + '?page_size=1'
+        plain = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertIn(b'"next":"http://', b''.join(plain.streaming_content))
+        secure = self.client.get(url, HTTP_ACCEPT='application/json', secure=True)
+        self.assertEqual(secure['X-Response-Cache'], 'miss')
+        self.assertIn(b'"next":"https://', b''.join(secure.streaming_content))
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='application/json')['X-Response-Cache'], 'hit')
@@ -1,6 +1,6 @@
 from django.urls import path
 from django.urls import path
-from .views import BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView
+from .views import BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView, ResponseCacheStatsView
 
 urlpatterns = [
     path('books/', BookListView.as_view(), name='book-list'),
@@ -8,4 +8,5 @@ urlpatterns = [
     path('books/create/', BookCreateView.as_view(), name='book-create'),
     path('books/update/<int:pk>/', BookUpdateView.as_view(), name='book-update'),
     path('books/delete/<int:pk>/', BookDeleteView.as_view(), name='book-delete'),
+    path('response-cache/stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
 ]
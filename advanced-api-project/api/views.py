@@ -4,21 +4,52 @@ from django.shortcuts import render
 # Create your views here.
 from rest_framework import generics, filters
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Book
+from .models import Author, Book
+from . import response_cache
+from .compiled import compile_serializer, compiled_serializers_enabled
 from .serializers import BookSerializer
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from .streaming import RESULTS, StreamingJSONResponse, StreamingPageNumberPagination, wants_stream
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters import rest_framework
 
 
 # Create your views here.
 
-class BookListView(generics.ListCreateAPIView):
-    queryset = Book.objects.all()
+class BookListView(response_cache.CachedResponseMixin, generics.ListCreateAPIView):
+    queryset = Book.objects.order_by('id')  # Pages must be stable to be paginated
     serializer_class = BookSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['title', 'author__name', 'publication_year']
     search_fields = ['title', 'author__name']
     ordering_fields = ['title', 'publication_year']
+    pagination_class = StreamingPageNumberPagination
+    # JSON pages are cached per query string until a book or author changes (see api/response_cache.py)
+    response_cache_name = 'book-list'
+    response_cache_models = (Book, Author)
+
+    def list(self, request, *args, **kwargs):
+        # JSON is streamed row by row (see api/streaming.py); other formats render as usual
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        if compiled_serializers_enabled():
+            # values() rows mapped by the compiled BookSerializer instead of model instances
+            serializer = compile_serializer(self.get_serializer_class())
+            queryset = serializer.values(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return StreamingJSONResponse(serializer, queryset)
+        return StreamingJSONResponse(serializer, page, self.paginator.get_paginated_data(RESULTS))
+
+class ResponseCacheStatsView(APIView):
+    """Response cache hits and misses per endpoint, for staff."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats([BookListView.response_cache_name]))
 
 class BookDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Book.objects.all()
@@ -0,0 +1,52 @@
+"""
+Data loading for the post detail page and the comment views.
+
+`post_detail.html` used to count the post's comments, load them all and then
+fetch each comment's author: 2 + N queries per view. `load_post_detail`
+instead fetches:
+
+1. the post with its author and comment count,
+2. its tags,
+3. one page of comments (`COMMENTS_PER_PAGE`) with their authors,
+
+so the page costs three queries however long the discussion is. Posts are
+looked up once per request: views that need the post in several places
+(CommentCreateView's form_valid and get_context_data) share the instance.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Count, prefetch_related_objects
+from django.http import Http404
+
+from .models import Post
+
+
+def get_post(request, pk):
+    """The post with its author and `comment_count`, looked up once per request."""
+    posts = request.__dict__.setdefault('_blog_posts', {})
+    pk = int(pk)
+    if pk not in posts:
+        try:
+            posts[pk] = (
+                Post.objects.select_related('author')
+                .annotate(comment_count=Count('comments'))
+                .get(pk=pk)
+            )
+        except Post.DoesNotExist:
+            raise Http404('No post found matching the query')
+    return posts[pk]
+
+
+def comment_page(post, number):
+    """One page of `post`'s comments, oldest first, with their authors."""
+    comments = post.comments.select_related('author').order_by('created_at', 'id')
+    paginator = Paginator(comments, getattr(settings, 'COMMENTS_PER_PAGE', 20))
+    paginator.count = post.comment_count  # Known already; saves a COUNT query
+    return paginator.get_page(number)
+
+
+def load_post_detail(request, pk):
+    """The post with its tags, and the comment page requested by `?page=`."""
+    post = get_post(request, pk)
+    prefetch_related_objects([post], 'tags')
+    return post, comment_page(post, request.GET.get('page'))
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Full-text index for posts; queried by blog/search.py
+FTS_TABLE = 'blog_post_fts'
+POST_CONTENT_TYPE = "(SELECT id FROM django_content_type WHERE app_label = 'blog' AND model = 'post')"
+
+
+def tags_of(post_id):
+    return (
+        "coalesce((SELECT group_concat(tag.name, ' ') FROM taggit_taggeditem item "
+        "JOIN taggit_tag tag ON tag.id = item.tag_id "
+        f"WHERE item.object_id = {post_id} AND item.content_type_id = {POST_CONTENT_TYPE}), '')"
+    )
+
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, content, tags, prefix='2 3', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (new.id, new.title, new.content, '');
+    END""",
+    f"""CREATE TRIGGER blog_post_fts_update AFTER UPDATE OF title, content ON blog_post BEGIN
+        UPDATE {FTS_TABLE} SET title = new.title, content = new.content WHERE rowid = new.id;
+    END""",
+    f"""CREATE TRIGGER blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER blog_post_fts_tag_added AFTER INSERT ON taggit_taggeditem
+        WHEN new.content_type_id = {POST_CONTENT_TYPE} BEGIN
+        UPDATE {FTS_TABLE} SET tags = {tags_of('new.object_id')} WHERE rowid = new.object_id;
+    END""",
+    f"""CREATE TRIGGER blog_post_fts_tag_removed AFTER DELETE ON taggit_taggeditem
+        WHEN old.content_type_id = {POST_CONTENT_TYPE} BEGIN
+        UPDATE {FTS_TABLE} SET tags = {tags_of('old.object_id')} WHERE rowid = old.object_id;
+    END""",
+    f"""CREATE TRIGGER blog_post_fts_tag_renamed AFTER UPDATE OF name ON taggit_tag BEGIN
+        UPDATE {FTS_TABLE} SET tags = {tags_of(f'{FTS_TABLE}.rowid')} WHERE rowid IN (
+            SELECT object_id FROM taggit_taggeditem
+            WHERE tag_id = new.id AND content_type_id = {POST_CONTENT_TYPE}
+        );
+    END""",
+    f"""INSERT INTO {FTS_TABLE}(rowid, title, content, tags)
+        SELECT id, title, content, {tags_of('blog_post.id')} FROM blog_post""",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_post_fts_update',
+    'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_post_fts_tag_added',
+    'DROP TRIGGER IF EXISTS blog_post_fts_tag_removed',
+    'DROP TRIGGER IF EXISTS blog_post_fts_tag_renamed',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_SCHEMA:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_add_taggable_manager'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchIndex',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='blog.post')),
+                ('title', models.TextField()),
+                ('content', models.TextField()),
+                ('tags', models.TextField()),
+            ],
+            options={
+                'db_table': 'blog_post_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
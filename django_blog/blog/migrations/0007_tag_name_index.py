@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:10
+
+from django.db import migrations
+
+# Case-insensitive tag lookups in blog/tags.py filter on lower(name)
+INDEX = 'blog_tag_name_lower'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_search'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX {INDEX} ON taggit_tag ((lower(name)))',
+            f'DROP INDEX {INDEX}',
+        ),
+    ]
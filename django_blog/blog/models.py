@@ -35,3 +35,19 @@ class Comment(models.Model):
     def __str__(self):
         return f'Comment by {self.author} on {self.post}'
        
+
+
+class PostSearchIndex(models.Model):
+    """
+    Read-only view of the FTS5 table indexing post titles, content and tag
+    names (see blog/search.py). Lets searches join it to `blog_post`.
+    """
+    post = models.OneToOneField(Post, primary_key=True, db_column='rowid', db_constraint=False,
+                                related_name='search_index', on_delete=models.DO_NOTHING)
+    title = models.TextField()
+    content = models.TextField()
+    tags = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'blog_post_fts'
@@ -0,0 +1,142 @@
+"""
+Rendered-page cache for the post list and post detail pages.
+
+Most readers are anonymous and see the same HTML, so `CachedPageMixin` keeps
+whole rendered responses for `PAGE_CACHE_TTL` seconds. Signed-in users get
+their own variant, keyed by user id, because the pages show them edit and
+delete links for their own posts and comments.
+
+Entries are never deleted one by one. Their keys embed version counters, and
+blog/signals.py bumps the counter covering what changed:
+
+* a post's version: the post, its comments or its tags changed (detail page);
+* the list version: any post was created, edited, deleted or (re)tagged
+  (every list page, including the tag cloud on it);
+* the site version: a tag was renamed or deleted (every page).
+
+Stale entries then simply stop being read and expire. The same key, hashed,
+is the page's ETag, so a browser revalidating an unchanged page gets a 304
+without the page being rendered or even read from the cache. Hits (including
+304s) and misses per page kind are counted in the cache, see `stats()` and the
+`page-cache-stats` view.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+POST_VERSION_KEY = 'blog:page-version:post:{}'
+LIST_VERSION_KEY = 'blog:page-version:list'
+SITE_VERSION_KEY = 'blog:page-version:site'
+PAGE_KEY = 'blog:page:{kind}:{versions}:{variant}:{path}'
+STAT_KEY = 'blog:page-cache:{kind}:{outcome}'
+KINDS = ('list', 'detail')
+
+
+def page_ttl():
+    return getattr(settings, 'PAGE_CACHE_TTL', 300)
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock, not 1: pages cached under an evicted
+        # counter's old values must not become readable again
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_post(post_id):
+    _bump(POST_VERSION_KEY.format(post_id))
+
+
+def invalidate_lists():
+    _bump(LIST_VERSION_KEY)
+
+
+def invalidate_all():
+    _bump(SITE_VERSION_KEY)
+
+
+def page_key(request, kind, post_id=None):
+    versions = [_version(SITE_VERSION_KEY)]
+    versions.append(_version(LIST_VERSION_KEY) if post_id is None else _version(POST_VERSION_KEY.format(post_id)))
+    variant = f'user{request.user.pk}' if request.user.is_authenticated else 'anon'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(kind=kind, versions='.'.join(map(str, versions)), variant=variant, path=path)
+
+
+def _count(kind, outcome):
+    key = STAT_KEY.format(kind=kind, outcome=outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def stats():
+    """Hits, misses and hit rate per page kind since the counters were last reset."""
+    counts = cache.get_many([STAT_KEY.format(kind=kind, outcome=outcome)
+                             for kind in KINDS for outcome in ('hit', 'miss')])
+    result = {}
+    for kind in KINDS:
+        hits = counts.get(STAT_KEY.format(kind=kind, outcome='hit'), 0)
+        misses = counts.get(STAT_KEY.format(kind=kind, outcome='miss'), 0)
+        result[kind] = {'hits': hits, 'misses': misses,
+                        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None}
+    return result
+
+
+def reset_stats():
+    cache.delete_many([STAT_KEY.format(kind=kind, outcome=outcome)
+                       for kind in KINDS for outcome in ('hit', 'miss')])
+
+
+class CachedPageMixin:
+    """
+    Serve GET requests from the page cache. Views set `page_cache_kind` and,
+    for single-post pages, the URL kwarg holding the post id. The view must
+    return a TemplateResponse whose content depends only on the URL and the
+    user (no CSRF tokens or flashed messages).
+    """
+    page_cache_kind = 'list'
+    page_cache_post_kwarg = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        post_id = kwargs.get(self.page_cache_post_kwarg) if self.page_cache_post_kwarg else None
+        key = page_key(request, self.page_cache_kind, post_id)
+        # The key changes whenever the page would, so it doubles as the ETag
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            _count(self.page_cache_kind, 'hit')
+            return not_modified
+        cacheable = request.method == 'GET' and page_ttl() > 0
+        response = cache.get(key) if cacheable else None
+        if response is not None:
+            _count(self.page_cache_kind, 'hit')
+            response['X-Page-Cache'] = 'hit'
+            return response
+        _count(self.page_cache_kind, 'miss')
+        response = super().dispatch(request, *args, **kwargs)
+        response['X-Page-Cache'] = 'miss'
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if cacheable and not response.cookies:
+                response.add_post_render_callback(lambda rendered: cache.set(key, rendered, page_ttl()))
+        return response
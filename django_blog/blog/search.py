@@ -0,0 +1,140 @@
+"""
+Full-text search for blog posts.
+
+`search_posts` used to OR three `icontains` lookups across the taggit join,
+`.distinct()` the result and then `.count()` it: two scans of every post per
+search. Posts are now indexed in an SQLite FTS5 table, `blog_post_fts`, with
+one row per post holding its title, content and tag names. Triggers on
+`blog_post`, `taggit_taggeditem` and `taggit_tag` keep it current, so saving a
+post or changing its tags re-indexes it (migration 0006 creates them).
+
+Results are ranked with bm25(), tag and title hits weighing more than content
+hits, and come with a highlighted content snippet. One query returns a page of
+results together with the total number of matches. Every
+term matches as a prefix. Databases without FTS5 fall back to `icontains`.
+"""
+import re
+
+from django.core.paginator import EmptyPage
+from django.db import connections
+from django.db.models import BooleanField, CharField, Count, FloatField, Q, Value, Window
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'blog_post_fts'
+WEIGHTS = {'title': 4.0, 'content': 1.0, 'tags': 6.0}  # bm25 column weights
+SNIPPET_TOKENS = 24
+# Control characters never typed by users; swapped for <mark> after escaping
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+
+
+def terms(query):
+    return re.findall(r'\w+', (query or '').lower())
+
+
+def highlight(snippet):
+    """Escape an FTS snippet and turn its match markers into <mark> tags."""
+    html = escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+class SearchPage:
+    """One page of ranked results, shaped like the bits of Django's Page the templates use."""
+
+    def __init__(self, results, number, per_page, total):
+        self.object_list = results
+        self.number = number
+        self.per_page = per_page
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def num_pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+    def has_next(self):
+        return self.number < self.num_pages
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def search(query, queryset=None):
+    """
+    Posts matching every term of `query`, annotated with `search_rank`
+    (higher is more relevant), `snippet` and `search_total`, the number of
+    matching posts in the whole index.
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    if connections[queryset.db].vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in words)
+        weights = ', '.join(str(weight) for weight in WEIGHTS.values())
+        snippet = f"snippet({FTS_TABLE}, 1, char(2), char(3), '…', {SNIPPET_TOKENS})"
+        # bm25() cannot share a query with window functions, so count the matches in a subquery
+        total = RawSQL(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        return (
+            queryset.filter(search_index__isnull=False)
+            .filter(RawSQL(f'{FTS_TABLE} MATCH %s', [match], output_field=BooleanField()))
+            .annotate(
+                search_rank=RawSQL(f'-bm25({FTS_TABLE}, {weights})', [], output_field=FloatField()),
+                snippet=RawSQL(snippet, [], output_field=CharField()),
+                search_total=total,
+            )
+        )
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(content__icontains=word) | Q(tags__name__icontains=word)
+    matches = queryset.filter(id__in=Post.objects.filter(condition).values('id'))
+    return matches.annotate(
+        search_rank=Value(0.0, output_field=FloatField()),
+        snippet=Value('', output_field=CharField()),
+        search_total=Window(Count('id')),
+    )
+
+
+def _ranked(query, page, per_page):
+    offset = (page - 1) * per_page
+    return list(
+        search(query)
+        .select_related('author')
+        .prefetch_related('tags')
+        .order_by('-search_rank', '-published_date', '-id')[offset:offset + per_page]
+    )
+
+
+def search_page(query, page=1, per_page=10):
+    """
+    Fetch one page of ranked results and the total match count in a single
+    query. Like Paginator.page(), raises EmptyPage for a page past the last
+    one (page 1 may be empty).
+    """
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+    if not terms(query):
+        return SearchPage([], page, per_page, 0)
+    results = _ranked(query, page, per_page)
+    if not results and page > 1:
+        raise EmptyPage('That page contains no results')
+    total = results[0].search_total if results else 0
+    for post in results:
+        post.highlighted = highlight(post.snippet) if post.snippet else None
+    return SearchPage(results, page, per_page, total)
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from .models import Comment, Post
+from . import page_cache, tags
+
+
+def _adjust_after_commit(tag_ids, delta):
+    if tag_ids:
+        transaction.on_commit(lambda: tags.adjust_counts(tag_ids, delta))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_counts(sender, instance, action, pk_set, **kwargs):
+    # Saving a post through PostForm calls post.tags.set(), which removes and
+    # adds only the tags that changed
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = list(instance.tags.values_list('id', flat=True))
+    elif action == 'post_clear':
+        _adjust_after_commit(getattr(instance, '_cleared_tag_ids', []), -1)
+    elif action == 'post_add':
+        _adjust_after_commit(list(pk_set), 1)
+    elif action == 'post_remove':
+        _adjust_after_commit(list(pk_set), -1)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    # The tagged items are gone by post_delete
+    instance._deleted_tag_ids = list(instance.tags.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def uncount_deleted_post_tags(sender, instance, **kwargs):
+    _adjust_after_commit(getattr(instance, '_deleted_tag_ids', []), -1)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cloud(sender, created=False, **kwargs):
+    # New tags are picked up when first counted; renames and deletions are not
+    if not created:
+        transaction.on_commit(tags.invalidate_cloud)
+
+
+def _invalidate_pages(*invalidations):
+    # Again after commit, in case another request re-cached the old page meanwhile
+    for invalidate, *args in invalidations:
+        invalidate(*args)
+    transaction.on_commit(lambda: [invalidate(*args) for invalidate, *args in invalidations])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    _invalidate_pages((page_cache.invalidate_post, instance.pk), (page_cache.invalidate_lists,))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_tagged_post_pages(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_pages((page_cache.invalidate_post, instance.pk), (page_cache.invalidate_lists,))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post_page(sender, instance, **kwargs):
+    _invalidate_pages((page_cache.invalidate_post, instance.post_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_pages_showing_tag(sender, created=False, **kwargs):
+    # Any page may show the tag; renames and deletions are rare
+    if not created:
+        _invalidate_pages((page_cache.invalidate_all,))
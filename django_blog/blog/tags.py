@@ -0,0 +1,105 @@
+"""
+Tag lookups and the cached tag cloud.
+
+Tag pages used to filter on `tags__name__iexact`, which SQLite turns into a
+LIKE that scans every tag. Lookups now compare `lower(name)`, which migration
+0007 indexes on `taggit_tag`, and new tags are matched case-insensitively
+(`TAGGIT_CASE_INSENSITIVE`), so "Django" and "django" stay one tag.
+
+The tag cloud (the `TAG_CLOUD_SIZE` most used tags with their post counts)
+is cached for `TAG_CLOUD_CACHE_TTL` seconds. Instead of being recounted, the
+counts are adjusted as posts gain or lose tags and as posts are deleted, see
+blog/signals.py. A tag the cache does not know yet, a renamed or deleted tag,
+or an evicted count makes the next read rebuild it from the database.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import Lower
+from taggit.models import Tag, TaggedItem
+
+from .models import Post
+
+CLOUD_KEY = 'blog:tag-cloud'  # tag id -> (name, slug)
+COUNT_KEY = 'blog:tag-count:{}'
+
+TagCount = namedtuple('TagCount', ['name', 'slug', 'count'])
+
+
+def cloud_ttl():
+    return getattr(settings, 'TAG_CLOUD_CACHE_TTL', 3600)
+
+
+def normalize(name):
+    return (name or '').strip().lower()
+
+
+def matching_tags(name):
+    """Tags called `name`, ignoring case; answered from the lower(name) index."""
+    return Tag.objects.alias(normalized=Lower('name')).filter(normalized=normalize(name))
+
+
+def posts_tagged(name, queryset=None):
+    queryset = Post.objects.all() if queryset is None else queryset
+    # Tags differing only in case may predate TAGGIT_CASE_INSENSITIVE
+    return queryset.filter(tags__in=matching_tags(name)).distinct()
+
+
+def _count_tags():
+    content_type = ContentType.objects.get_for_model(Post)
+    return (
+        TaggedItem.objects.filter(content_type=content_type)
+        .values_list('tag_id', 'tag__name', 'tag__slug')
+        .annotate(posts=Count('id'))
+    )
+
+
+def rebuild_cloud():
+    """Recount every tag and cache the result; returns the cached tags."""
+    tags, counts = {}, {}
+    for tag_id, name, slug, posts in _count_tags():
+        tags[tag_id] = (name, slug)
+        counts[COUNT_KEY.format(tag_id)] = posts
+    # Counts first: a reader that sees the tags finds their counts
+    cache.set_many(counts, cloud_ttl())
+    cache.set(CLOUD_KEY, tags, cloud_ttl())
+    return tags, counts
+
+
+def tag_cloud(size=None):
+    """The most used tags as TagCount(name, slug, count), busiest first."""
+    size = size or getattr(settings, 'TAG_CLOUD_SIZE', 30)
+    tags = cache.get(CLOUD_KEY)
+    counts = cache.get_many([COUNT_KEY.format(tag_id) for tag_id in tags]) if tags is not None else {}
+    if tags is None or len(counts) < len(tags):
+        tags, counts = rebuild_cloud()
+    cloud = [
+        TagCount(name, slug, counts[COUNT_KEY.format(tag_id)])
+        for tag_id, (name, slug) in tags.items()
+        if counts[COUNT_KEY.format(tag_id)] > 0
+    ]
+    cloud.sort(key=lambda tag: (-tag.count, tag.name.lower()))
+    return cloud[:size]
+
+
+def adjust_counts(tag_ids, delta):
+    """Add `delta` to the cached post count of each tag."""
+    tags = cache.get(CLOUD_KEY)
+    if tags is None:
+        return  # Nothing cached; the next read counts from scratch
+    for tag_id in tag_ids:
+        if tag_id not in tags:
+            cache.delete(CLOUD_KEY)
+            return
+        try:
+            cache.incr(COUNT_KEY.format(tag_id), delta)
+        except ValueError:
+            cache.delete(CLOUD_KEY)
+            return
+
+
+def invalidate_cloud():
+    cache.delete(CLOUD_KEY)
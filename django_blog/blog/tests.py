@@ -1,3 +1,298 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Comment, Post
+from . import page_cache
+from .search import search, search_page
+from .tags import matching_tags, posts_tagged, tag_cloud
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.tagged = Post.objects.create(author=self.author, title='Weekend notes', content='Nothing special')
+        self.tagged.tags.add('python')
+        self.in_title = Post.objects.create(author=self.author, title='Python tips', content='Short list')
+        self.in_content = Post.objects.create(author=self.author, title='Misc',
+                                              content='I wrote <b>some</b> python scripts today')
+
+    def titles(self, query):
+        return [post.title for post in search_page(query)]
+
+    def test_tags_and_titles_outrank_content(self):
+        self.assertEqual(self.titles('python'), ['Weekend notes', 'Python tips', 'Misc'])
+
+    def test_prefix_terms_must_all_match(self):
+        self.assertEqual(self.titles('pyth scr'), ['Misc'])
+        self.assertEqual(self.titles('!!!'), [])
+
+    def test_index_follows_edits_and_tag_changes(self):
+        self.tagged.tags.remove('python')
+        self.assertNotIn('Weekend notes', self.titles('python'))
+        self.in_title.title = 'Django tips'
+        self.in_title.save()
+        self.assertEqual(self.titles('django'), ['Django tips'])
+        self.in_content.delete()
+        self.assertEqual(self.titles('python'), [])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        post = search_page('python').object_list[-1]
+        self.assertIn('<mark>python</mark>', post.highlighted)
+        self.assertIn('&lt;b&gt;some&lt;/b&gt;', post.highlighted)
+
+    def test_page_and_total_come_from_one_query(self):
+        for i in range(12):
+            Post.objects.create(author=self.author, title=f'Python {i}', content='x')
+        with self.assertNumQueries(2):  # Results with the total, then the tag prefetch
+            page = search_page('python', page=2)
+        self.assertEqual(page.total, 15)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        self.assertEqual(search('python').count(), 15)
+
+    def test_page_past_the_end_is_not_found_like_the_list_views(self):
+        with self.assertRaises(EmptyPage):
+            search_page('python', page=99)
+        self.assertEqual(len(search_page('zzz', page=1)), 0)
+        response = self.client.get(reverse('search-posts'), {'q': 'python', 'page': '5'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(reverse('post-list'), {'page': '999'}).status_code, 404)
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search-posts'), {'q': 'python', 'page': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Found 3 results')
+        self.assertContains(response, '<mark>python</mark>', html=False)
+
+
+class TagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.first = Post.objects.create(author=self.author, title='First', content='...')
+        self.second = Post.objects.create(author=self.author, title='Second', content='...')
+        self.first.tags.add('Django', 'python')
+        self.second.tags.add('django')
+
+    def cloud(self):
+        return [(tag.name, tag.count) for tag in tag_cloud()]
+
+    def test_tags_are_matched_ignoring_case(self):
+        self.assertEqual(list(matching_tags(' DJANGO ').values_list('name', flat=True)), ['Django'])
+        self.assertEqual(set(posts_tagged('django')), {self.first, self.second})
+        self.assertIn('blog_tag_name_lower', matching_tags('django').explain())
+
+    @override_settings(PAGE_CACHE_TTL=0)
+    def test_listings_prefetch_tags(self):
+        for i in range(5):
+            Post.objects.create(author=self.author, title=f'Post {i}', content='...').tags.add('python')
+        # Cloud warm: the post count, the page of posts, then their tags
+        self.client.get(reverse('post-list'))
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('post-list'))
+        self.assertContains(response, 'python (6)')
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('tagged-posts', args=['PYTHON']))
+        self.assertContains(response, 'Found 6 posts')
+        # Post with author and comment count, then its tags; no comments to load
+        with self.assertNumQueries(2):
+            self.client.get(reverse('post-detail', args=[self.first.pk]))
+
+    def test_cloud_counts_follow_tagging_without_recounting(self):
+        self.assertEqual(self.cloud(), [('Django', 2), ('python', 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.tags.set(['python'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cloud(), [('python', 2), ('Django', 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cloud(), [('python', 1)])
+
+    def test_new_and_renamed_tags_rebuild_the_cloud(self):
+        self.cloud()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.tags.add('orm')
+        self.assertIn(('orm', 1), self.cloud())
+        tag = matching_tags('orm').get()
+        tag.name = 'ORM'
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        self.assertIn(('ORM', 1), self.cloud())
+
+
+@override_settings(POSTS_PER_PAGE=5, PAGE_CACHE_TTL=0)
+class PostListPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def add_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'writer{Post.objects.count()}')
+            post = Post.objects.create(author=author, title=f'Post {i}', content='...')
+            post.tags.add(f'topic{i % 3}', 'blog')
+
+    def queries_for(self, url):
+        self.client.get(url)  # Warm the tag cloud
+        with self.assertNumQueries(3) as context:
+            self.client.get(url)
+        return len(context.captured_queries)
+
+    def test_query_budget_does_not_grow_with_posts(self):
+        for url in [reverse('post-list'), reverse('tagged-posts', args=['blog'])]:
+            self.add_posts(3)
+            few = self.queries_for(url)
+            self.add_posts(30)
+            self.assertEqual(self.queries_for(url), few)
+            self.assertEqual(self.queries_for(url + '?page=2'), few)
+
+    def test_pages(self):
+        self.add_posts(12)
+        response = self.client.get(reverse('post-list'), {'page': 3})
+        self.assertEqual([post.title for post in response.context['posts']], ['Post 1', 'Post 0'])
+        self.assertContains(response, 'Page 3 of 3')
+        self.assertContains(response, '?page=2')
+        response = self.client.get(reverse('tagged-posts', args=['Topic0']))
+        self.assertContains(response, 'Found 4 posts')
+        self.assertEqual(self.client.get(reverse('post-list'), {'page': 9}).status_code, 404)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345', is_staff=True)
+        self.post = Post.objects.create(author=self.author, title='Cached', content='First version')
+        self.other = Post.objects.create(author=self.author, title='Other', content='...')
+        self.detail = reverse('post-detail', args=[self.post.pk])
+        self.other_detail = reverse('post-detail', args=[self.other.pk])
+
+    def get(self, url):
+        response = self.client.get(url)
+        return response['X-Page-Cache'], response
+
+    def test_pages_are_served_from_cache(self):
+        self.assertEqual(self.get(self.detail)[0], 'miss')
+        with self.assertNumQueries(0):
+            outcome, response = self.get(self.detail)
+        self.assertEqual(outcome, 'hit')
+        self.assertContains(response, 'First version')
+        self.assertEqual(self.get(reverse('post-list'))[0], 'miss')
+        self.assertEqual(self.get(reverse('post-list'))[0], 'hit')
+        self.assertEqual(self.get(reverse('post-list') + '?page=1')[0], 'miss')
+
+    def test_signed_in_users_get_their_own_variant(self):
+        self.get(self.detail)
+        self.client.force_login(self.author)
+        outcome, response = self.get(self.detail)
+        self.assertEqual(outcome, 'miss')
+        self.assertContains(response, 'Edit Post')
+        self.client.force_login(self.reader)
+        outcome, response = self.get(self.detail)
+        self.assertEqual(outcome, 'miss')
+        self.assertNotContains(response, 'Edit Post')
+
+    def warm(self, *urls):
+        for url in urls:
+            self.get(url)
+
+    def test_comments_invalidate_only_their_post(self):
+        self.warm(self.detail, self.other_detail, reverse('post-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.reader, content='Nice')
+        outcome, response = self.get(self.detail)
+        self.assertEqual(outcome, 'miss')
+        self.assertContains(response, 'Nice')
+        self.assertEqual(self.get(self.other_detail)[0], 'hit')
+        self.assertEqual(self.get(reverse('post-list'))[0], 'hit')
+
+    def test_post_and_tag_changes_invalidate_post_and_lists(self):
+        self.warm(self.detail, self.other_detail, reverse('post-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add('fresh')
+        self.assertEqual(self.get(self.detail)[0], 'miss')
+        self.assertEqual(self.get(self.other_detail)[0], 'hit')
+        self.assertContains(self.get(reverse('post-list'))[1], 'fresh (1)')
+        self.post.content = 'Second version'
+        self.post.save()
+        self.assertContains(self.get(self.detail)[1], 'Second version')
+        tag = self.post.tags.get()
+        tag.name = 'renamed'
+        tag.save()
+        self.assertEqual(self.get(self.other_detail)[0], 'miss')
+
+    def test_stats(self):
+        page_cache.reset_stats()
+        self.warm(self.detail, self.detail, self.detail, reverse('post-list'))
+        self.assertEqual(page_cache.stats()['detail'], {'hits': 2, 'misses': 1, 'hit_rate': 0.6667})
+        self.assertEqual(self.client.get(reverse('page-cache-stats')).status_code, 302)
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('page-cache-stats'))
+        self.assertEqual(response.json()['list'], {'hits': 0, 'misses': 1, 'hit_rate': 0.0})
+
+
+@override_settings(COMMENTS_PER_PAGE=5, PAGE_CACHE_TTL=0)
+class PostDetailLoaderTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Busy', content='...')
+        self.post.tags.add('django')
+        for i in range(12):
+            commenter = User.objects.create_user(username=f'commenter{i}')
+            Comment.objects.create(post=self.post, author=commenter, content=f'Comment {i}')
+
+    def test_detail_page_takes_three_queries(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        # Post with author and comment count, tags, then a page of comments with authors
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'Comments (12)')
+        self.assertContains(response, 'commenter4')
+        self.assertNotContains(response, 'commenter5')
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'page': 3})
+        self.assertContains(response, 'Comment 11')
+        self.assertContains(response, 'Page 3 of 3')
+        self.assertEqual(self.client.get(reverse('post-detail', args=[999])).status_code, 404)
+
+    def test_comment_views_look_the_post_up_once(self):
+        self.client.force_login(self.author)
+        url = reverse('add-comment', args=[self.post.pk])
+        # Session, user, post
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        # Session, user, post, then the insert
+        with self.assertNumQueries(4):
+            response = self.client.post(url, {'content': 'Late to the party'})
+        self.assertRedirects(response, reverse('post-detail', args=[self.post.pk]), fetch_redirect_response=False)
+        self.assertEqual(self.client.post(reverse('add-comment', args=[999]), {'content': 'x'}).status_code, 404)
+
+
+class ConditionalPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Cached', content='...')
+        self.url = reverse('post-detail', args=[self.post.pk])
+
+    def test_unchanged_pages_are_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.author, content='New')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    @override_settings(PAGE_CACHE_TTL=0)
+    def test_etags_without_page_caching(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotIn('ETag', self.client.get(reverse('post-detail', args=[999])))
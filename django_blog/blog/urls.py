@@ -41,4 +41,7 @@ urlpatterns = [
     path('search/', search_posts, name='search-posts'),  # Search posts
     path('tags/<str:tag_name>/', TaggedPostListView.as_view(), name='tagged-posts'),  # Posts by tag
     path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='posts-by-tag'),  # Posts by tag (slug version)
+
+    # Monitoring
+    path('page-cache/stats/', views.page_cache_stats, name='page-cache-stats'),  # Page cache hit rates (staff only)
 ]
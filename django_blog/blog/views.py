@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render
 
 # Create your views here.
@@ -11,12 +12,17 @@ from django.contrib.auth.mixins import UserPassesTestMixin
 from django.shortcuts import redirect
 from django.contrib.auth import login
 from .forms import CustomUserCreationForm
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.paginator import EmptyPage
+from django.http import Http404, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
 from .models import Post, Comment
 from .forms import CommentForm
-from django.db.models import Q
+from .loaders import get_post, load_post_detail
+from .page_cache import CachedPageMixin
+from . import page_cache
+from .search import search_page
+from .tags import normalize, posts_tagged, tag_cloud
 
 def register(request):
     if request.method == 'POST':
@@ -45,10 +51,6 @@ def profile(request):
     return render(request, 'blog/profile.html')
 
 
-class PostDetailView(DetailView):
-    model = Post
-    template_name = 'blog/post_detail.html'
-
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
     form_class = PostForm
@@ -94,16 +96,38 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == post.author  # Only allow authors to delete their own posts
 
 
-class PostListView(ListView):
+class PostPaginationMixin:
+    def get_paginate_by(self, queryset):
+        return getattr(settings, 'POSTS_PER_PAGE', 10)
+
+
+class PostListView(CachedPageMixin, PostPaginationMixin, ListView):
+    page_cache_kind = 'list'
     model = Post
+    queryset = Post.objects.select_related('author').prefetch_related('tags')
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
-    ordering = ['-published_date']  # Orders posts by published date
+    ordering = ['-published_date', '-id']  # Orders posts by published date
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag_cloud'] = tag_cloud()
+        return context
 
-class PostDetailView(DetailView):
+class PostDetailView(CachedPageMixin, DetailView):
+    page_cache_kind = 'detail'
+    page_cache_post_kwarg = 'pk'
     model = Post
     template_name = 'blog/post_detail.html'
-    
+
+    def get_object(self, queryset=None):
+        post, self.comment_page = load_post_detail(self.request, self.kwargs['pk'])
+        return post
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comment_page'] = self.comment_page
+        return context
 
 # View for posting a comment on a blog post
 class CommentCreateView(LoginRequiredMixin, CreateView):
@@ -113,7 +137,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        form.instance.post = get_object_or_404(Post, pk=self.kwargs['pk'])
+        form.instance.post = get_post(self.request, self.kwargs['pk'])
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -121,7 +145,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['post'] = get_object_or_404(Post, pk=self.kwargs['pk'])
+        context['post'] = get_post(self.request, self.kwargs['pk'])
         return context
 
 # View for editing a comment
@@ -135,7 +159,7 @@ class CommentUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return self.request.user == comment.author
 
     def get_success_url(self):
-        return reverse_lazy('post-detail', kwargs={'pk': self.object.post.pk})
+        return reverse_lazy('post-detail', kwargs={'pk': self.object.post_id})
 
 # View for deleting a comment
 class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
@@ -147,40 +171,48 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == comment.author
 
     def get_success_url(self):
-        return reverse_lazy('post-detail', kwargs={'pk': self.object.post.pk})
+        return reverse_lazy('post-detail', kwargs={'pk': self.object.post_id})
 
 def search_posts(request):
     query = request.GET.get('q')
-    results = Post.objects.none()
+    results = None
     if query:
-        # Search in title, content, and tags
-        results = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct().order_by('-published_date')
+        # Ranked full-text search: one query for the page and the match count
+        try:
+            results = search_page(query, page=request.GET.get('page') or 1,
+                                  per_page=getattr(settings, 'POSTS_PER_PAGE', 10))
+        except EmptyPage:
+            # Past the last page: 404, like the paginated list views
+            raise Http404('Invalid page')
     return render(request, 'blog/search_results.html', {
         'results': results, 
         'query': query,
-        'total_results': results.count() if query else 0
+        'total_results': results.total if results else 0
     })
     
 
-class TaggedPostListView(ListView):
+class TaggedPostListView(PostPaginationMixin, ListView):
     model = Post
     template_name = 'blog/tagged_posts.html'
     context_object_name = 'posts'
 
     def get_queryset(self):
         tag_name = self.kwargs.get('tag_name') or self.kwargs.get('tag_slug')
-        return Post.objects.filter(tags__name__iexact=tag_name).order_by('-published_date')
+        posts = posts_tagged(tag_name).select_related('author').prefetch_related('tags')
+        return posts.order_by('-published_date', '-id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag_name'] = self.kwargs.get('tag_name') or self.kwargs.get('tag_slug')
+        context['tag_key'] = normalize(context['tag_name'])
         return context
 
 
 # Alias for the required PostByTagListView
 PostByTagListView = TaggedPostListView
 
+
+@user_passes_test(lambda user: user.is_staff)
+def page_cache_stats(request):
+    """Page cache hits and misses per page kind, for staff."""
+    return JsonResponse(page_cache.stats())
@@ -130,3 +130,13 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Posts shown per page on the post list and tag pages
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20  # Comments shown per page under a post
+PAGE_CACHE_TTL = 300  # Seconds rendered list and detail pages are cached; 0 disables (see blog/page_cache.py)
+
+# Tags (see blog/tags.py)
+TAGGIT_CASE_INSENSITIVE = True  # "Django" and "django" are one tag
+TAG_CLOUD_SIZE = 30  # Most used tags shown in the tag cloud
+TAG_CLOUD_CACHE_TTL = 3600  # Seconds; counts are also adjusted as posts are tagged
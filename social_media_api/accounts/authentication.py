@@ -0,0 +1,117 @@
+"""
+Token authentication with a per-process lookup cache.
+
+`CachedTokenAuthentication` verifies the hashed, expiring `AuthToken`s from
+accounts/tokens.py. Looking a token up joins `AuthToken` and the user table,
+so recently seen digest -> (user, token) pairs are kept in a bounded LRU for
+`TOKEN_AUTH_CACHE_TTL` seconds (at most `TOKEN_AUTH_CACHE_SIZE` entries): a
+busy client costs one query per TTL instead of one per request. Expiry is
+checked on every request, cached or not.
+
+Entries are dropped when a token is deleted (logout, rotation, purge) and when
+its user is saved (deactivation, password or profile changes), see
+accounts/signals.py. The cache is local to each process; in other processes a
+revoked token stays valid for at most the TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AuthToken
+from .tokens import hash_key
+
+
+class TokenCache:
+    def __init__(self):
+        self._entries = OrderedDict()  # digest -> (cached until, user, token)
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, user, token):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].pk]
+
+    def invalidate_token(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        digest = hash_key(key)
+        cached = token_cache.get(digest)
+        if cached is None:
+            try:
+                token = AuthToken.objects.select_related('user').get(digest=digest)
+            except AuthToken.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            user = token.user
+            token_cache.set(digest, user, token)
+        else:
+            user, token = cached
+        if token.expires_at <= timezone.now():
+            token_cache.invalidate_token(digest)
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        # Each request gets its own instances; views may modify request.user
+        return copy.copy(user), copy.copy(token)
@@ -0,0 +1,75 @@
+"""
+Bulk follow / unfollow.
+
+Following thousands of accounts through `following_users.add()` one target at
+a time costs a lookup, an insert and a timeline backfill per target. Here the
+target ids are validated in one query, the through-table rows are written with
+a single `bulk_create(ignore_conflicts=True)` (or one DELETE), and every
+"followed you" notification goes out in one `notify_many()` batch.
+
+Bulk writes bypass the m2m_changed signal, so the follow-graph cache and the
+follower's home timeline are brought up to date here instead.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from notifications.dispatch import PendingNotification, notify_many
+from posts import timeline
+from social_media_api.conditional import touch
+from . import follow_graph
+
+
+class BulkFollowResult:
+    def __init__(self, changed=(), unchanged=(), missing=()):
+        self.changed = sorted(changed)
+        self.unchanged = sorted(unchanged)
+        self.missing = sorted(missing)
+
+    def as_dict(self):
+        return {'changed': self.changed, 'unchanged': self.unchanged, 'missing': self.missing}
+
+
+def _clean_ids(follower_id, target_ids):
+    return {int(target_id) for target_id in target_ids} - {follower_id}
+
+
+def _invalidate(follower_id, target_ids):
+    follow_graph.invalidate([follower_id], target_ids)
+    transaction.on_commit(lambda: follow_graph.invalidate([follower_id], target_ids))
+    touch(get_user_model(), follower_id, *target_ids)  # Profiles show follow counts
+
+
+def bulk_follow(follower, target_ids):
+    """Make `follower` follow every existing user in `target_ids`."""
+    User = get_user_model()
+    Follow = User.followers.through
+    target_ids = _clean_ids(follower.pk, target_ids)
+    existing = set(User.objects.filter(id__in=target_ids).values_list('id', flat=True))
+    already = existing & follow_graph.following_ids(follower.pk)
+    new = existing - already
+    if new:
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                [Follow(from_customuser_id=target_id, to_customuser_id=follower.pk) for target_id in new],
+                ignore_conflicts=True,
+            )
+            _invalidate(follower.pk, new)
+            timeline.rebuild_timeline(follower.pk)
+            notify_many(
+                PendingNotification(target_id, follower.pk, 'followed you', User, target_id)
+                for target_id in new
+            )
+    return BulkFollowResult(changed=new, unchanged=already, missing=target_ids - existing)
+
+
+def bulk_unfollow(follower, target_ids):
+    """Make `follower` stop following every user in `target_ids`."""
+    Follow = get_user_model().followers.through
+    target_ids = _clean_ids(follower.pk, target_ids)
+    following = target_ids & follow_graph.following_ids(follower.pk)
+    if following:
+        with transaction.atomic():
+            Follow.objects.filter(to_customuser_id=follower.pk, from_customuser_id__in=following).delete()
+            _invalidate(follower.pk, following)
+            timeline.remove_authors_from_timeline(follower.pk, following)
+    return BulkFollowResult(changed=following, unchanged=target_ids - following)
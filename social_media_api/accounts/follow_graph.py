@@ -0,0 +1,118 @@
+"""
+Cached follow graph.
+
+Follower and following id sets and their counts are cached per user so
+"is A following B", follower counts and the id lists used by the feed do not
+hit the `CustomUser.followers` through-table on every call. Entries are
+invalidated from the m2m_changed signal whenever a follow is added or removed
+(see accounts/signals.py), and expire after `FOLLOW_GRAPH_CACHE_TTL` seconds.
+
+Sets larger than `FOLLOW_GRAPH_MAX_CACHED_IDS` are not cached (their counts
+still are); reads for them go to the database.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+
+# Row (from_customuser=A, to_customuser=B) means B follows A.
+_COLUMNS = {
+    FOLLOWERS: ('from_customuser_id', 'to_customuser_id'),
+    FOLLOWING: ('to_customuser_id', 'from_customuser_id'),
+}
+_RELATED = {
+    FOLLOWERS: 'to_customuser',
+    FOLLOWING: 'from_customuser',
+}
+
+
+def _follow_model():
+    return get_user_model().followers.through
+
+
+def _ttl():
+    return getattr(settings, 'FOLLOW_GRAPH_CACHE_TTL', 600)
+
+
+def _ids_key(direction, user_id):
+    return f'follow-graph:{direction}:ids:{user_id}'
+
+
+def _count_key(direction, user_id):
+    return f'follow-graph:{direction}:count:{user_id}'
+
+
+def _ids(direction, user_id):
+    key = _ids_key(direction, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        owner, other = _COLUMNS[direction]
+        ids = frozenset(_follow_model().objects.filter(**{owner: user_id}).values_list(other, flat=True))
+        if len(ids) <= getattr(settings, 'FOLLOW_GRAPH_MAX_CACHED_IDS', 10000):
+            cache.set(key, ids, _ttl())
+        cache.set(_count_key(direction, user_id), len(ids), _ttl())
+    return ids
+
+
+def _counts(direction, user_ids):
+    keys = {_count_key(direction, user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(keys)
+    counts = {keys[key]: count for key, count in cached.items()}
+    missing = [user_id for key, user_id in keys.items() if key not in cached]
+    if missing:
+        owner, _ = _COLUMNS[direction]
+        fresh = dict(
+            _follow_model().objects.filter(**{f'{owner}__in': missing}).order_by()
+            .values(owner).annotate(n=Count('id')).values_list(owner, 'n')
+        )
+        fresh = {user_id: fresh.get(user_id, 0) for user_id in missing}
+        cache.set_many({_count_key(direction, user_id): n for user_id, n in fresh.items()}, _ttl())
+        counts.update(fresh)
+    return counts
+
+
+def edges(direction, user_id):
+    """Through-table rows for one side of a user's graph, the other user joined in."""
+    owner, _ = _COLUMNS[direction]
+    return _follow_model().objects.filter(**{owner: user_id}).select_related(_RELATED[direction])
+
+
+def other_user(direction, edge):
+    return getattr(edge, _RELATED[direction])
+
+
+def follower_ids(user_id):
+    return _ids(FOLLOWERS, user_id)
+
+
+def following_ids(user_id):
+    return _ids(FOLLOWING, user_id)
+
+
+def is_following(user_id, target_id):
+    return int(target_id) in following_ids(user_id)
+
+
+def follower_counts(user_ids):
+    return _counts(FOLLOWERS, user_ids)
+
+
+def follower_count(user_id):
+    return follower_counts([user_id])[user_id]
+
+
+def following_count(user_id):
+    return _counts(FOLLOWING, [user_id])[user_id]
+
+
+def invalidate(follower_ids=(), followed_ids=()):
+    """Forget cached state after `follower_ids` (un)followed `followed_ids`."""
+    keys = []
+    for user_id in follower_ids:
+        keys += [_ids_key(FOLLOWING, user_id), _count_key(FOLLOWING, user_id)]
+    for user_id in followed_ids:
+        keys += [_ids_key(FOLLOWERS, user_id), _count_key(FOLLOWERS, user_id)]
+    cache.delete_many(keys)
@@ -0,0 +1,104 @@
+"""
+Django Management Command to bulk follow (or unfollow) users for one account
+Reads target user ids from --ids, a CSV file (a `user_id`/`id` column, or the
+first column) or a JSONL file (one id or {"user_id": ...} object per line) and
+applies them in batches with accounts.bulk_follow.
+"""
+
+import csv
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from accounts.bulk_follow import bulk_follow, bulk_unfollow
+from notifications.dispatch import get_dispatcher
+
+ID_COLUMNS = ('user_id', 'id')
+
+
+def read_csv(handle):
+    rows = csv.reader(handle)
+    header = next(rows, None)
+    if header is None:
+        return
+    column = next((header.index(name) for name in ID_COLUMNS if name in header), None)
+    if column is None:
+        column = 0
+        rows = [header, *rows]
+    for row in rows:
+        if row and row[column].strip():
+            yield row[column]
+
+
+def read_jsonl(handle):
+    for line in handle:
+        if not line.strip():
+            continue
+        value = json.loads(line)
+        if isinstance(value, dict):
+            value = next((value[name] for name in ID_COLUMNS if name in value), None)
+        if value is not None:
+            yield value
+
+
+READERS = {'.csv': read_csv, '.jsonl': read_jsonl, '.ndjson': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = 'Bulk follow or unfollow users for one account from an id list, CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Account doing the following')
+        parser.add_argument('--ids', help='Comma-separated target user ids')
+        parser.add_argument('--file', help='CSV or JSONL file of target user ids')
+        parser.add_argument('--unfollow', action='store_true', help='Unfollow the targets instead')
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'BULK_FOLLOW_MAX_IDS', 1000))
+
+    def read_ids(self, options):
+        if options['ids']:
+            yield from (value for value in options['ids'].split(',') if value.strip())
+        if options['file']:
+            path = Path(options['file'])
+            reader = READERS.get(path.suffix.lower())
+            if reader is None:
+                raise CommandError(f'Unsupported file type {path.suffix!r}; use .csv or .jsonl')
+            with path.open(newline='', encoding='utf-8') as handle:
+                yield from reader(handle)
+
+    def handle(self, *args, **options):
+        if not options['ids'] and not options['file']:
+            raise CommandError('Pass --ids and/or --file')
+        try:
+            follower = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+        operation = bulk_unfollow if options['unfollow'] else bulk_follow
+
+        changed = unchanged = missing = 0
+        batch = []
+
+        def apply(batch):
+            nonlocal changed, unchanged, missing
+            result = operation(follower, batch)
+            changed += len(result.changed)
+            unchanged += len(result.unchanged)
+            missing += len(result.missing)
+
+        for value in self.read_ids(options):
+            try:
+                batch.append(int(value))
+            except (TypeError, ValueError):
+                raise CommandError(f'Invalid user id {value!r}')
+            if len(batch) >= options['batch_size']:
+                apply(batch)
+                batch = []
+        if batch:
+            apply(batch)
+        get_dispatcher().flush()
+
+        verb = 'Unfollowed' if options['unfollow'] else 'Followed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {changed} user(s); {unchanged} unchanged, {missing} not found'
+        ))
@@ -0,0 +1,24 @@
+"""
+Django Management Command to purge expired API tokens
+Deletes AuthToken rows past their expiry in small batches so the token table
+stays small; schedule it (cron, a task runner, ...) to run daily.
+"""
+
+from django.core.management.base import BaseCommand
+from accounts import tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired API tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = 0
+        for deleted in tokens.purge_expired(batch_size=options['batch_size']):
+            purged += deleted
+            if options['verbosity'] > 1:
+                self.stdout.write(f'   deleted {deleted} token(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired token(s)'))
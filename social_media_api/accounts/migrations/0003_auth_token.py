@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:32
+
+import hashlib
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def import_legacy_tokens(apps, schema_editor):
+    # Existing clients keep working: their DRF tokens become hashed, expiring ones
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('accounts', 'AuthToken')
+    expires_at = timezone.now() + timedelta(seconds=getattr(settings, 'AUTH_TOKEN_LIFETIME', 14 * 24 * 3600))
+    AuthToken.objects.bulk_create([
+        AuthToken(digest=hashlib.sha256(key.encode()).hexdigest(), user_id=user_id, expires_at=expires_at)
+        for key, user_id in Token.objects.values_list('key', 'user_id').iterator()
+    ], ignore_conflicts=True)
+    Token.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_customuser_bio_alter_customuser_followers_and_more'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='accounts_token_expiry')],
+            },
+        ),
+        migrations.RunPython(import_legacy_tokens, migrations.RunPython.noop),
+    ]
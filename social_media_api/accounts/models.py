@@ -13,3 +13,22 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class AuthToken(models.Model):
+    """
+    Expiring API token stored as a SHA-256 digest; the raw key is only shown
+    once, when the token is issued (see accounts/tokens.py).
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='auth_tokens')
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='accounts_token_expiry'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} (expires {self.expires_at:%Y-%m-%d %H:%M})'
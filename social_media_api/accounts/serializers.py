@@ -1,12 +1,31 @@
 from rest_framework import serializers
 from .models import CustomUser
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework.authtoken.models import Token
+from . import follow_graph
 
-class UserSerializer(serializers.ModelSerializer):
+class FollowCountsMixin(serializers.Serializer):
+    """Follower/following counts from the follow-graph cache (lists are paginated separately)."""
+    followers_count = serializers.SerializerMethodField()
+    following_count = serializers.SerializerMethodField()
+
+    def get_followers_count(self, obj):
+        return follow_graph.follower_count(obj.pk)
+
+    def get_following_count(self, obj):
+        return follow_graph.following_count(obj.pk)
+
+
+class UserSerializer(FollowCountsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'followers_count', 'following_count']
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
-        fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'followers']
+        fields = ['id', 'username', 'profile_picture']
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -23,15 +42,19 @@ class RegisterSerializer(serializers.ModelSerializer):
             password=validated_data['password'],
             bio=validated_data.get('bio', '')
         )
-        # Create token for the user
-        Token.objects.create(user=user)
         return user
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
-    following = serializers.StringRelatedField(many=True, read_only=True)
-    followers = serializers.StringRelatedField(many=True, read_only=True)
-
+class CustomUserSerializer(FollowCountsMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
-        fields = ['id', 'username', 'following', 'followers']
+        fields = ['id', 'username', 'followers_count', 'following_count']
+
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=getattr(settings, 'BULK_FOLLOW_MAX_IDS', 1000),
+    )
@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from social_media_api.conditional import touch
+from .authentication import token_cache
+from .models import AuthToken, CustomUser
+from . import follow_graph
+
+
+@receiver(m2m_changed, sender=CustomUser.followers.through)
+def invalidate_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    # author.followers.add(user) arrives with the author as instance,
+    # user.following_users.add(author) arrives reversed with the follower.
+    if action == 'pre_clear':
+        # Remember who is affected before the rows disappear
+        if reverse:
+            instance._follow_graph_cleared = follow_graph.following_ids(instance.pk)
+        else:
+            instance._follow_graph_cleared = follow_graph.follower_ids(instance.pk)
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_follow_graph_cleared', ())
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if reverse:
+        follower_ids, followed_ids = [instance.pk], list(pk_set)
+    else:
+        follower_ids, followed_ids = list(pk_set), [instance.pk]
+    # Again after commit, in case another request re-cached the old state meanwhile
+    follow_graph.invalidate(follower_ids, followed_ids)
+    transaction.on_commit(lambda: follow_graph.invalidate(follower_ids, followed_ids))
+    touch(CustomUser, *follower_ids, *followed_ids)  # Profiles show follow counts
+
+
+@receiver(post_delete, sender=AuthToken)
+def invalidate_cached_token(sender, instance, **kwargs):
+    # Logout, rotation and purges all delete the old token
+    token_cache.invalidate_token(instance.digest)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Deactivation, password and profile changes must not be served stale
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def touch_profile(sender, instance, raw=False, **kwargs):
+    # Profiles, and posts and comments embedding the username, change with the user
+    if not raw:
+        touch(CustomUser, instance.pk)
@@ -1,3 +1,280 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from notifications.models import Notification
+from posts.models import Post, TimelineEntry
+from social_media_api.testing import QueryCountAssertionsMixin, malformed_cursors
+from .authentication import token_cache
+from .models import AuthToken
+from . import follow_graph, tokens
+
+
+class FollowGraphTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.alice = User.objects.create_user(username='alice', password='pass12345')
+        self.bob = User.objects.create_user(username='bob', password='pass12345')
+        self.carol = User.objects.create_user(username='carol', password='pass12345')
+        self.alice.following_users.add(self.bob)
+        self.carol.following_users.add(self.bob)
+
+    def test_cached_reads_skip_the_database(self):
+        self.assertEqual(follow_graph.follower_ids(self.bob.pk), {self.alice.pk, self.carol.pk})
+        self.assertEqual(follow_graph.following_ids(self.alice.pk), {self.bob.pk})
+        self.assertEqual(follow_graph.following_ids(self.bob.pk), frozenset())
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(self.alice.pk, self.bob.pk))
+            self.assertFalse(follow_graph.is_following(self.bob.pk, self.alice.pk))
+            self.assertEqual(follow_graph.follower_count(self.bob.pk), 2)
+            self.assertEqual(follow_graph.following_count(self.alice.pk), 1)
+
+    def test_counts_are_fetched_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = follow_graph.follower_counts([self.alice.pk, self.bob.pk, self.carol.pk])
+        self.assertEqual(counts, {self.alice.pk: 0, self.bob.pk: 2, self.carol.pk: 0})
+
+    def test_follow_and_unfollow_invalidate(self):
+        self.assertFalse(follow_graph.is_following(self.bob.pk, self.carol.pk))
+        self.assertEqual(follow_graph.follower_count(self.carol.pk), 0)
+        self.bob.following_users.add(self.carol)
+        self.assertTrue(follow_graph.is_following(self.bob.pk, self.carol.pk))
+        self.assertEqual(follow_graph.follower_ids(self.carol.pk), {self.bob.pk})
+
+        self.alice.following_users.remove(self.bob)
+        self.assertEqual(follow_graph.follower_ids(self.bob.pk), {self.carol.pk})
+        self.assertEqual(follow_graph.following_count(self.alice.pk), 0)
+
+        self.bob.followers.clear()
+        self.assertEqual(follow_graph.follower_ids(self.bob.pk), frozenset())
+        self.assertEqual(follow_graph.following_ids(self.carol.pk), frozenset())
+
+    def test_cannot_follow_yourself(self):
+        Post.objects.create(author=self.bob, title='Mine', content='x')
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(reverse('follow-user', args=[self.bob.pk]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(follow_graph.is_following(self.bob.pk, self.bob.pk))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.bob).exists())
+        self.assertFalse(Notification.objects.filter(recipient=self.bob).exists())
+
+    def test_follow_endpoint_and_profile_use_graph(self):
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(reverse('follow-user', args=[self.alice.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(follow_graph.is_following(self.bob.pk, self.alice.pk))
+
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data['followers_count'], 2)
+        self.assertEqual(response.data['following_count'], 1)
+
+
+class FollowListTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.star = User.objects.create_user(username='star', password='pass12345')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='pass12345') for i in range(5)]
+        for fan in self.fans:
+            fan.following_users.add(self.star)
+        self.client.force_authenticate(self.fans[0])
+
+    def test_followers_are_cursor_paginated(self):
+        url = reverse('user-followers', args=[self.star.pk])
+        seen = []
+        while url:
+            response = self.client.get(url, {'page_size': 2} if not seen else None)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 5)
+            seen += [user['id'] for user in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [fan.pk for fan in reversed(self.fans)])
+
+    def test_following_list(self):
+        response = self.client.get(reverse('user-following', args=[self.fans[0].pk]))
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['username'], 'star')
+
+    def test_page_queries_do_not_grow_with_followers(self):
+        url = reverse('user-followers', args=[self.star.pk])
+
+        def grow():
+            fan = get_user_model().objects.create_user(username=f'late{self.star.followers.count()}',
+                                                       password='pass12345')
+            fan.following_users.add(self.star)
+
+        self.assertConstantQueries(lambda: self.client.get(url), grow)
+
+    def test_profile_has_counts_not_lists(self):
+        response = self.client.get(reverse('profile'))
+        self.assertNotIn('followers', response.data)
+        self.assertEqual(response.data['following_count'], 1)
+
+    def test_malformed_cursor_is_404(self):
+        for cursor in malformed_cursors(1):
+            for name in ('user-followers', 'user-following'):
+                with self.subTest(name=name, cursor=cursor):
+                    response = self.client.get(reverse(name, args=[self.star.pk]), {'cursor': cursor})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_unknown_user_is_404(self):
+        response = self.client.get(reverse('user-followers', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(NOTIFICATIONS_DISPATCHER={'BACKEND': 'notifications.dispatch.SyncDispatcher'})
+class BulkFollowTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.newcomer = User.objects.create_user(username='newcomer', password='pass12345')
+        self.others = [User.objects.create_user(username=f'user{i}', password='pass12345') for i in range(4)]
+        self.post = Post.objects.create(author=self.others[0], title='Hello', content='x')
+        self.newcomer.following_users.add(self.others[3])
+        self.client.force_authenticate(self.newcomer)
+
+    def test_bulk_follow(self):
+        ids = [user.pk for user in self.others] + [self.newcomer.pk, 9999]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['changed'], [user.pk for user in self.others[:3]])
+        self.assertEqual(response.data['unchanged'], [self.others[3].pk])
+        self.assertEqual(response.data['missing'], [9999])
+        self.assertEqual(follow_graph.following_ids(self.newcomer.pk), {user.pk for user in self.others})
+        self.assertTrue(TimelineEntry.objects.filter(user=self.newcomer, post=self.post).exists())
+        self.assertEqual(Notification.objects.filter(actor=self.newcomer, verb='followed you').count(), 3)
+
+    def test_bulk_unfollow(self):
+        self.newcomer.following_users.add(self.others[0])
+        response = self.client.post(reverse('bulk-unfollow'),
+                                    {'user_ids': [self.others[0].pk, self.others[1].pk]}, format='json')
+        self.assertEqual(response.data['changed'], [self.others[0].pk])
+        self.assertEqual(follow_graph.following_ids(self.newcomer.pk), {self.others[3].pk})
+        self.assertFalse(TimelineEntry.objects.filter(user=self.newcomer, post=self.post).exists())
+
+    def test_rejects_empty_list(self):
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_command_reads_csv_and_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = Path(directory) / 'follows.csv'
+            csv_path.write_text(f'user_id,name\n{self.others[0].pk},a\n{self.others[1].pk},b\n')
+            jsonl_path = Path(directory) / 'follows.jsonl'
+            jsonl_path.write_text(f'{self.others[2].pk}\n{{"user_id": 9999}}\n')
+            out = StringIO()
+            call_command('import_follows', 'newcomer', '--file', str(csv_path), '--batch-size', '1', stdout=out)
+            call_command('import_follows', 'newcomer', '--file', str(jsonl_path), stdout=out)
+        self.assertIn('Followed 2 user(s)', out.getvalue())
+        self.assertIn('1 not found', out.getvalue())
+        self.assertEqual(follow_graph.following_ids(self.newcomer.pk), {user.pk for user in self.others})
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(username='tok', password='pass12345')
+        self.token, self.key = tokens.issue(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_token_lookup_is_cached(self):
+        url = reverse('notification_unread_count')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_invalidates(self):
+        self.client.get(reverse('profile'))
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 200)
+        self.assertEqual(len(token_cache), 0)
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+    def test_rotation_and_deactivation_invalidate(self):
+        self.client.get(reverse('profile'))
+        response = self.client.post(reverse('rotate-token'))
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+    @override_settings(TOKEN_AUTH_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        other = get_user_model().objects.create_user(username='tok2', password='pass12345')
+        other_token, other_key = tokens.issue(other)
+        self.client.get(reverse('profile'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other_key}')
+        self.client.get(reverse('profile'))
+        self.assertEqual(len(token_cache), 1)
+        self.assertIsNone(token_cache.get(self.token.digest))
+
+    def test_login_issues_a_new_token(self):
+        self.client.credentials()
+        response = self.client.post(reverse('login'), {'username': 'tok', 'password': 'pass12345'})
+        self.assertEqual(response.data['user_id'], self.user.pk)
+        self.assertNotEqual(response.data['token'], self.key)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+
+
+class AuthTokenTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(username='tok', password='pass12345')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_only_the_digest_is_stored(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'fresh', 'password': 'pass12345', 'email': 'fresh@example.com',
+        })
+        self.assertEqual(response.status_code, 201)
+        key = response.data['token']
+        stored = AuthToken.objects.get(user__username='fresh')
+        self.assertEqual(stored.digest, tokens.hash_key(key))
+        self.assertNotIn(key, stored.digest)
+
+    def test_expired_tokens_are_rejected_even_when_cached(self):
+        token, key = tokens.issue(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        cached_user, cached_token = token_cache.get(token.digest)
+        cached_token.expires_at = timezone.now() - timedelta(seconds=1)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNone(token_cache.get(token.digest))
+
+    @override_settings(AUTH_TOKEN_MAX_PER_USER=2)
+    def test_live_tokens_per_user_are_capped(self):
+        first = tokens.issue(self.user)[0]
+        tokens.issue(self.user)
+        tokens.issue(self.user)
+        self.assertEqual(self.user.auth_tokens.count(), 2)
+        self.assertFalse(AuthToken.objects.filter(digest=first.digest).exists())
+
+    def test_purge_removes_expired_tokens_in_batches(self):
+        expiring = [tokens.issue(self.user)[0].digest for _ in range(3)]
+        live = tokens.issue(self.user)[0]
+        AuthToken.objects.filter(digest__in=expiring).update(expires_at=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        call_command('purge_expired_tokens', '--batch-size', '2', stdout=out)
+        self.assertIn('Purged 3 expired token(s)', out.getvalue())
+        self.assertEqual(list(AuthToken.objects.values_list('digest', flat=True)), [live.digest])
@@ -0,0 +1,64 @@
+"""
+Expiring, rotating API tokens.
+
+Only the SHA-256 digest of a token key is stored (`AuthToken.digest`), so a
+leaked table or backup cannot be replayed. Keys are 160 random bits, so a plain
+hash is enough; a slow password hash would only slow down every request.
+Lookups are by digest, which tells a timing observer nothing about the key.
+
+Tokens expire `AUTH_TOKEN_LIFETIME` seconds after they are issued. Issuing a
+token drops the user's expired ones and keeps at most `AUTH_TOKEN_MAX_PER_USER`
+live tokens; `purge_expired()` (`python manage.py purge_expired_tokens`)
+removes the rest in batches.
+"""
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AuthToken
+
+
+def token_lifetime():
+    return timedelta(seconds=getattr(settings, 'AUTH_TOKEN_LIFETIME', 14 * 24 * 3600))
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue(user):
+    """Create a token for `user`; returns (token, raw key). The key is not stored."""
+    key = secrets.token_hex(20)
+    now = timezone.now()
+    with transaction.atomic():
+        user.auth_tokens.filter(expires_at__lte=now).delete()
+        token = AuthToken.objects.create(digest=hash_key(key), user=user, expires_at=now + token_lifetime())
+        keep = getattr(settings, 'AUTH_TOKEN_MAX_PER_USER', 10)
+        surplus = list(user.auth_tokens.order_by('-created', '-expires_at').values_list('digest', flat=True)[keep:])
+        if surplus:
+            AuthToken.objects.filter(digest__in=surplus).delete()
+    return token, key
+
+
+def rotate(token):
+    """Replace `token` with a fresh one for the same user."""
+    with transaction.atomic():
+        token.delete()
+        return issue(token.user)
+
+
+def purge_expired(batch_size=1000, now=None):
+    """Delete expired tokens in batches; yields the number deleted per batch."""
+    now = now or timezone.now()
+    while True:
+        digests = list(AuthToken.objects.filter(expires_at__lte=now)
+                       .order_by('expires_at').values_list('digest', flat=True)[:batch_size])
+        if not digests:
+            break
+        with transaction.atomic():
+            deleted, _ = AuthToken.objects.filter(digest__in=digests).delete()
+        yield deleted
@@ -1,12 +1,19 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView
+from .views import RegisterView, LoginView, LogoutView, RotateTokenView, ProfileView
 from .views import FollowUserView, UnfollowUserView, accounts_root
+from .views import FollowerListView, FollowingListView, BulkFollowView, BulkUnfollowView
 
 urlpatterns = [
     path('', accounts_root, name='accounts-root'),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/rotate/', RotateTokenView.as_view(), name='rotate-token'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path('<int:user_id>/followers/', FollowerListView.as_view(), name='user-followers'),
+    path('<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
 ]
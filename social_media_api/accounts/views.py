@@ -2,9 +2,8 @@ from django.shortcuts import render
 
 # Create your views here.
 from rest_framework import generics
-from .models import CustomUser
-from .serializers import UserSerializer, RegisterSerializer
-from rest_framework.authtoken.models import Token
+from .models import AuthToken, CustomUser
+from .serializers import UserSerializer, RegisterSerializer, UserSummarySerializer, BulkFollowSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -15,7 +14,17 @@ from django.shortcuts import get_object_or_404
 from rest_framework import permissions
 from posts.models import Post
 from posts.serializers import PostSerializer
+from posts.timeline import home_timeline
+from social_media_api.conditional import ConditionalResponseMixin
+from social_media_api.pagination import IdKeysetPagination
+from social_media_api.query_planner import plan_queryset
+from social_media_api.streaming import StreamingJSONResponse, wants_stream
+from social_media_api.throttling import SlidingWindowThrottle
 from django.http import JsonResponse
+from django.db import transaction
+from notifications.dispatch import notify
+from . import follow_graph, tokens
+from .bulk_follow import bulk_follow, bulk_unfollow
 
 
 def accounts_root(request):
@@ -25,9 +34,15 @@ def accounts_root(request):
         'endpoints': {
             'register': '/api/accounts/register/',
             'login': '/api/accounts/login/',
+            'logout': '/api/accounts/logout/',
+            'rotate_token': '/api/accounts/token/rotate/',
             'profile': '/api/accounts/profile/',
             'follow_user': '/api/accounts/follow/<user_id>/',
             'unfollow_user': '/api/accounts/unfollow/<user_id>/',
+            'bulk_follow': '/api/accounts/follow/bulk/',
+            'bulk_unfollow': '/api/accounts/unfollow/bulk/',
+            'followers': '/api/accounts/<user_id>/followers/',
+            'following': '/api/accounts/<user_id>/following/',
         }
     })
 
@@ -36,6 +51,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = []  # Allow unauthenticated access for registration
+    throttle_scope = 'register'
     
     def get(self, request, *args, **kwargs):
         """Handle GET requests to show register endpoint information"""
@@ -59,11 +75,12 @@ class RegisterView(generics.CreateAPIView):
                 'username': 'john_doe',
                 'email': 'john@example.com',
                 'bio': 'Hello, I am John!',
-                'token': 'auto_generated_auth_token'
+                'token': 'auto_generated_auth_token',
+                'expires_at': 'token expiry (ISO 8601)'
             },
             'notes': [
                 'Password will be securely hashed',
-                'Authentication token is automatically created',
+                'An expiring authentication token is automatically created',
                 'Bio field is optional'
             ]
         })
@@ -72,18 +89,21 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        token, created = Token.objects.get_or_create(user=user)
+        token, key = tokens.issue(user)
         
         return Response({
             'id': user.id,
             'username': user.username,
             'email': user.email,
             'bio': user.bio,
-            'token': token.key
+            'token': key,
+            'expires_at': token.expires_at
         }, status=status.HTTP_201_CREATED)
 
 class LoginView(ObtainAuthToken):
     permission_classes = []  # Allow unauthenticated access for login
+    throttle_classes = [SlidingWindowThrottle]  # ObtainAuthToken disables throttling
+    throttle_scope = 'login'
     
     def get(self, request, *args, **kwargs):
         """Handle GET requests to show login endpoint information"""
@@ -100,28 +120,56 @@ class LoginView(ObtainAuthToken):
             },
             'success_response': {
                 'token': 'your_auth_token',
+                'expires_at': 'token expiry (ISO 8601)',
                 'user_id': 'user_id',
                 'email': 'user_email'
             }
         })
     
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        token = Token.objects.get(key=response.data['token'])
-        user = CustomUser.objects.get(id=token.user_id)
+        # Each login issues a new expiring token; the user comes from the serializer
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        token, key = tokens.issue(user)
         return Response({
-            'token': token.key,
+            'token': key,
+            'expires_at': token.expires_at,
             'user_id': user.pk,
             'email': user.email
         })
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if isinstance(request.auth, AuthToken):
+            request.auth.delete()
+        return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
+
+
+class RotateTokenView(APIView):
+    """Swap the current token for a fresh one; the old key stops working immediately."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request.auth, AuthToken):
+            return Response({"error": "Token authentication required"}, status=status.HTTP_400_BAD_REQUEST)
+        token, key = tokens.rotate(request.auth)
+        return Response({'token': key, 'expires_at': token.expires_at})
+
+class ProfileView(ConditionalResponseMixin, generics.RetrieveUpdateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    etag_timestamp_field = None  # Users have none; saves and follows touch the profile
 
     def get_object(self):
         return self.request.user
+
+    def get_etag_object_id(self):
+        return self.request.user.pk
     
     def get(self, request, *args, **kwargs):
         """Override to provide helpful information or user profile"""
@@ -144,19 +192,21 @@ class ProfileView(generics.RetrieveUpdateAPIView):
                     'email': 'string',
                     'bio': 'string',
                     'profile_picture': 'string (URL)',
-                    'followers': 'array (read-only)'
+                    'followers_count': 'integer (read-only)',
+                    'following_count': 'integer (read-only)'
                 }
             }, status=401)
 
 
 class FollowUserView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follows'
 
     def get(self, request, user_id):
         """Handle GET requests to show follow endpoint information"""
         try:
             user_to_follow = get_object_or_404(CustomUser, id=user_id)
-            is_following = request.user.following.filter(id=user_id).exists()
+            is_following = follow_graph.is_following(request.user.pk, user_id)
             
             return Response({
                 'message': 'Follow user endpoint',
@@ -180,17 +230,23 @@ class FollowUserView(generics.GenericAPIView):
 
     def post(self, request, user_id):
         user_to_follow = get_object_or_404(CustomUser, id=user_id)
-        request.user.following.add(user_to_follow)
+        if user_to_follow.pk == request.user.pk:
+            return Response({"error": "You cannot follow yourself"}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if not follow_graph.is_following(request.user.pk, user_to_follow.id):
+                request.user.following_users.add(user_to_follow)
+                notify(user_to_follow.id, request.user.pk, 'followed you', user_to_follow)
         return Response({"message": f"You are now following {user_to_follow.username}"}, status=status.HTTP_200_OK)
 
 class UnfollowUserView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follows'
 
     def get(self, request, user_id):
         """Handle GET requests to show unfollow endpoint information"""
         try:
             user_to_unfollow = get_object_or_404(CustomUser, id=user_id)
-            is_following = request.user.following.filter(id=user_id).exists()
+            is_following = follow_graph.is_following(request.user.pk, user_id)
             
             return Response({
                 'message': 'Unfollow user endpoint',
@@ -214,15 +270,66 @@ class UnfollowUserView(generics.GenericAPIView):
 
     def post(self, request, user_id):
         user_to_unfollow = get_object_or_404(CustomUser, id=user_id)
-        request.user.following.remove(user_to_unfollow)
+        request.user.following_users.remove(user_to_unfollow)
         return Response({"message": f"You have unfollowed {user_to_unfollow.username}"}, status=status.HTTP_200_OK)
 
 
+class BulkFollowView(generics.GenericAPIView):
+    """Follow up to `BULK_FOLLOW_MAX_IDS` users at once: {"user_ids": [...]}."""
+    serializer_class = BulkFollowSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'bulk_follows'
+    operation = staticmethod(bulk_follow)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = self.operation(request.user, serializer.validated_data['user_ids'])
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+
+class BulkUnfollowView(BulkFollowView):
+    """Unfollow up to `BULK_FOLLOW_MAX_IDS` users at once: {"user_ids": [...]}."""
+    operation = staticmethod(bulk_unfollow)
+
+
+class FollowerListView(generics.ListAPIView):
+    """Users following `user_id`, most recent follow first (cursor-paginated)."""
+    serializer_class = UserSummarySerializer
+    pagination_class = IdKeysetPagination
+    permission_classes = [permissions.IsAuthenticated]
+    direction = follow_graph.FOLLOWERS
+
+    def get_queryset(self):
+        return follow_graph.edges(self.direction, self.kwargs['user_id'])
+
+    def get_count(self, user_id):
+        return follow_graph.follower_count(user_id)
+
+    def list(self, request, user_id):
+        get_object_or_404(CustomUser, id=user_id)
+        page = self.paginate_queryset(self.get_queryset())
+        users = [follow_graph.other_user(self.direction, edge) for edge in page]
+        data = self.paginator.get_paginated_data(self.get_serializer(users, many=True).data)
+        data['count'] = self.get_count(user_id)
+        return Response(data)
+
+
+class FollowingListView(FollowerListView):
+    """Users `user_id` follows, most recent follow first (cursor-paginated)."""
+    direction = follow_graph.FOLLOWING
+
+    def get_count(self, user_id):
+        return follow_graph.following_count(user_id)
+
+
 class UserFeedView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        following_users = request.user.following.all()
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
+        posts = plan_queryset(home_timeline(request.user), PostSerializer())
+        if wants_stream(request):
+            # The whole timeline, unpaginated: stream it in bounded memory
+            return StreamingJSONResponse(PostSerializer(), posts)
         serializer = PostSerializer(posts, many=True)
         return Response(serializer.data)
@@ -0,0 +1,109 @@
+"""
+Notification coalescing.
+
+Notifications for the same recipient, verb and target that arrive within
+`NOTIFICATIONS_COALESCE_WINDOW` seconds of an unread notification are merged
+into that row: its `actor_count` grows, `actor` becomes the latest actor and
+`recent_actors` keeps the newest `NOTIFICATIONS_RECENT_ACTORS` actor ids. A
+popular post therefore produces one row per burst of likes instead of one row
+per like. Set the window to 0 to store every notification separately.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification
+from . import unread
+
+
+def coalesce_window():
+    return getattr(settings, 'NOTIFICATIONS_COALESCE_WINDOW', 3600)
+
+
+def recent_actors_limit():
+    return getattr(settings, 'NOTIFICATIONS_RECENT_ACTORS', 3)
+
+
+def _merge_actors(newest_first, previous):
+    merged = []
+    for actor_id in list(newest_first) + list(previous):
+        if actor_id not in merged:
+            merged.append(actor_id)
+    return merged[:recent_actors_limit()]
+
+
+def _keyed(pending):
+    for item in pending:
+        content_type = ContentType.objects.get_for_model(item.target_model)
+        yield (item.recipient_id, item.verb, content_type.pk, item.target_id), item
+
+
+def _new_row(key, items):
+    recipient_id, verb, content_type_id, target_id = key
+    newest_first = [item.actor_id for item in reversed(items)]
+    return Notification(
+        recipient_id=recipient_id,
+        actor_id=newest_first[0],
+        verb=verb,
+        target_content_type_id=content_type_id,
+        target_object_id=target_id,
+        actor_count=len(items),
+        recent_actors=_merge_actors(newest_first, []),
+    )
+
+
+def _count_unread(rows):
+    new_unread = {}
+    for row in rows:
+        new_unread[row.recipient_id] = new_unread.get(row.recipient_id, 0) + 1
+    for recipient_id, count in new_unread.items():
+        unread.adjust(recipient_id, count)
+    return rows
+
+
+def deliver(pending):
+    """Write pending notifications, merging them into recent unread rows."""
+    window = coalesce_window()
+    if window <= 0:
+        rows = Notification.objects.bulk_create([_new_row(key, [item]) for key, item in _keyed(pending)])
+        return _count_unread(rows)
+
+    groups = {}
+    for key, item in _keyed(pending):
+        groups.setdefault(key, []).append(item)
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {}
+        candidates = (
+            Notification.objects.select_for_update()
+            .filter(is_read=False, timestamp__gte=now - timedelta(seconds=window),
+                    target_object_id__in={key[3] for key in groups},
+                    recipient_id__in={key[0] for key in groups})
+            .only('pk', 'recipient_id', 'verb', 'target_content_type_id', 'target_object_id',
+                  'actor_id', 'recent_actors')
+            .order_by('-timestamp')
+        )
+        for row in candidates:
+            key = (row.recipient_id, row.verb, row.target_content_type_id, row.target_object_id)
+            existing.setdefault(key, row)
+
+        created = []
+        for key, items in groups.items():
+            row = existing.get(key)
+            if row is None:
+                created.append(_new_row(key, items))
+                continue
+            newest_first = [item.actor_id for item in reversed(items)]
+            Notification.objects.filter(pk=row.pk).update(
+                actor_id=newest_first[0],
+                actor_count=F('actor_count') + len(items),
+                recent_actors=_merge_actors(newest_first, row.recent_actors or [row.actor_id]),
+                timestamp=now,
+            )
+        rows = Notification.objects.bulk_create(created)
+    return _count_unread(rows)
@@ -0,0 +1,193 @@
+"""
+In-process notification delivery.
+
+Views call `notify()`; the notification is handed to the configured dispatcher
+once the surrounding transaction commits, so the request never waits on the
+notification insert (or the ContentType lookup for its target). The default
+`ThreadedDispatcher` drains a local queue with a small pool of worker threads
+and writes notifications in batches, coalescing repeats (see coalescing.py).
+`SyncDispatcher` writes immediately and is meant for tests and management
+commands.
+
+Configured through the `NOTIFICATIONS_DISPATCHER` setting:
+
+    NOTIFICATIONS_DISPATCHER = {
+        'BACKEND': 'notifications.dispatch.ThreadedDispatcher',
+        'OPTIONS': {'workers': 2, 'batch_size': 100, 'flush_interval': 0.05},
+    }
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import coalescing
+
+logger = logging.getLogger(__name__)
+
+PendingNotification = namedtuple('PendingNotification', 'recipient_id actor_id verb target_model target_id')
+
+DEFAULT_DISPATCHER = {
+    'BACKEND': 'notifications.dispatch.ThreadedDispatcher',
+    'OPTIONS': {},
+}
+
+
+class BaseDispatcher:
+    def enqueue(self, pending):
+        raise NotImplementedError
+
+    def flush(self, timeout=None):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def write(self, pending):
+        return coalescing.deliver(pending)
+
+
+class SyncDispatcher(BaseDispatcher):
+    """Write notifications immediately in the calling thread."""
+
+    def enqueue(self, pending):
+        self.write(pending)
+
+
+class ThreadedDispatcher(BaseDispatcher):
+    """
+    Queue notifications locally and write them from worker threads.
+
+    Each worker takes up to `batch_size` items, waiting at most
+    `flush_interval` seconds for a batch to fill. When the queue is full the
+    caller writes its own notifications instead of dropping them.
+    """
+    _stop = object()
+
+    def __init__(self, workers=2, batch_size=100, flush_interval=0.05, max_queue_size=10000):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'notification-dispatcher-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.shutdown)
+
+    def enqueue(self, pending):
+        self._ensure_started()
+        overflow = []
+        for item in pending:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                overflow.append(item)
+        if overflow:
+            self.write(overflow)
+
+    def _next_batch(self):
+        item = self.queue.get()
+        if item is self._stop:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is self._stop:
+                self.queue.put(item)  # Leave it for the outer loop
+                self.queue.task_done()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                self.queue.task_done()
+                break
+            try:
+                self.write(batch)
+            except Exception:
+                logger.exception('Failed to write %d notification(s)', len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+                close_old_connections()
+
+    def flush(self, timeout=None):
+        """Block until every queued notification has been written."""
+        if not self._threads:
+            return
+        if timeout is None:
+            self.queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def shutdown(self):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self.queue.put(self._stop)
+        for thread in threads:
+            thread.join()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                config = getattr(settings, 'NOTIFICATIONS_DISPATCHER', DEFAULT_DISPATCHER)
+                backend = import_string(config.get('BACKEND', DEFAULT_DISPATCHER['BACKEND']))
+                _dispatcher = backend(**config.get('OPTIONS', {}))
+    return _dispatcher
+
+
+@receiver(setting_changed)
+def reset_dispatcher(setting, **kwargs):
+    global _dispatcher
+    if setting == 'NOTIFICATIONS_DISPATCHER' and _dispatcher is not None:
+        _dispatcher.shutdown()
+        _dispatcher = None
+
+
+def notify_many(pending):
+    """Deliver `PendingNotification`s once the current transaction commits."""
+    pending = list(pending)
+    if pending:
+        transaction.on_commit(lambda: get_dispatcher().enqueue(pending))
+
+
+def notify(recipient_id, actor_id, verb, target):
+    notify_many([PendingNotification(recipient_id, actor_id, verb, type(target), target.pk)])
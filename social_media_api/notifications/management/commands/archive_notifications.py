@@ -0,0 +1,42 @@
+"""
+Django Management Command to archive old read notifications
+Copies read notifications older than the retention age to a gzip JSONL file
+and deletes them in small chunks. Meant to be scheduled, e.g. nightly:
+
+    0 3 * * * cd /path/to/social_media_api && python manage.py archive_notifications --time-budget 600
+"""
+
+from django.core.management.base import BaseCommand
+from notifications.retention import archive_read_notifications
+
+
+class Command(BaseCommand):
+    help = 'Archive read notifications older than the retention age and delete them in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Retention age in days (default: NOTIFICATIONS_RETENTION_DAYS)')
+        parser.add_argument('--archive-dir', default=None,
+                            help='Directory for archive files (default: NOTIFICATIONS_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows archived and deleted per transaction')
+        parser.add_argument('--time-budget', type=float, default=None, help='Stop after this many seconds')
+        parser.add_argument('--dry-run', action='store_true', help='Count eligible rows without writing or deleting')
+
+    def handle(self, *args, **options):
+        result = archive_read_notifications(
+            older_than_days=options['days'],
+            archive_dir=options['archive_dir'],
+            chunk_size=options['chunk_size'],
+            time_budget=options['time_budget'],
+            dry_run=options['dry_run'],
+        )
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.archived} notification(s) in {result.chunks} chunk(s), '
+            f'{result.elapsed:.2f}s ({result.rows_per_second:.0f} rows/s)'
+        ))
+        if result.path:
+            self.stdout.write(f'   Archive: {result.path}')
+        if result.budget_exhausted:
+            self.stdout.write(self.style.WARNING('   Time budget reached; run again to continue'))
@@ -12,3 +12,14 @@ class Notification(models.Model):
     target = GenericForeignKey('target_content_type', 'target_object_id')
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)  # To track read/unread status
+    # Coalescing: one unread row per (recipient, verb, target) within a time window,
+    # e.g. "Alice and 41 others liked your post". `actor` is the latest actor.
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actors = models.JSONField(default=list, blank=True)  # Latest actor ids, newest first
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_recent'),  # Keyset pagination
+            models.Index(fields=['target_content_type', 'target_object_id', 'recipient'], name='notif_coalesce'),
+            models.Index(fields=['recipient', 'is_read', 'timestamp'], name='notif_recipient_unread'),  # Unread count/mark-read
+        ]
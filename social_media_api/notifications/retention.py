@@ -0,0 +1,99 @@
+"""
+Notification retention.
+
+Read notifications older than `NOTIFICATIONS_RETENTION_DAYS` are copied to a
+gzip-compressed JSONL archive under `NOTIFICATIONS_ARCHIVE_DIR` and then
+deleted in small primary-key ranges, each in its own short transaction, so the
+table is never locked for long. Unread notifications are never touched.
+
+`archive_read_notifications()` is the schedulable entry point (cron, a task
+runner, ...); `python manage.py archive_notifications` wraps it.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+ARCHIVED_FIELDS = (
+    'id', 'recipient_id', 'actor_id', 'verb', 'target_content_type_id', 'target_object_id',
+    'timestamp', 'actor_count', 'recent_actors',
+)
+
+
+class RetentionResult:
+    def __init__(self, path):
+        self.path = path
+        self.archived = 0
+        self.chunks = 0
+        self.elapsed = 0.0
+        self.budget_exhausted = False
+
+    @property
+    def rows_per_second(self):
+        return self.archived / self.elapsed if self.elapsed else 0.0
+
+
+def default_archive_dir():
+    return Path(getattr(settings, 'NOTIFICATIONS_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+
+
+def archive_read_notifications(older_than_days=None, archive_dir=None, chunk_size=500,
+                               time_budget=None, dry_run=False):
+    """
+    Archive and delete read notifications older than `older_than_days`.
+
+    Stops before starting a new chunk once `time_budget` seconds have elapsed;
+    the next run picks up where this one stopped.
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'NOTIFICATIONS_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    expired = Notification.objects.filter(is_read=True, timestamp__lt=cutoff)
+
+    archive_dir = Path(archive_dir) if archive_dir else default_archive_dir()
+    # Microseconds and the pid keep runs from sharing an archive; 'xt' below
+    # refuses to truncate one whose rows were already deleted.
+    path = archive_dir / f"notifications-{timezone.now():%Y%m%dT%H%M%S%f}-{os.getpid()}.jsonl.gz"
+    result = RetentionResult(None if dry_run else path)
+    started = time.monotonic()
+    last_pk = 0
+    archive = None
+    try:
+        while True:
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                result.budget_exhausted = True
+                break
+            rows = list(expired.filter(pk__gt=last_pk).order_by('pk').values(*ARCHIVED_FIELDS)[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1]['id']
+            if not dry_run:
+                if archive is None:
+                    archive_dir.mkdir(parents=True, exist_ok=True)
+                    archive = gzip.open(path, 'xt', encoding='utf-8')
+                for row in rows:
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')))
+                    archive.write('\n')
+                archive.flush()
+                # Only the rows just archived: a row in this PK range that was
+                # marked read meanwhile is left for the next run.
+                with transaction.atomic():
+                    expired.filter(pk__in=[row['id'] for row in rows]).delete()
+            result.archived += len(rows)
+            result.chunks += 1
+    finally:
+        if archive is not None:
+            archive.close()
+        result.elapsed = time.monotonic() - started
+    if not result.archived:
+        result.path = None
+    return result
@@ -2,7 +2,9 @@ from rest_framework import serializers
 from .models import Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
+    target = serializers.StringRelatedField()
+
     class Meta:
         model = Notification
-        fields = ['id', 'actor', 'verb', 'target', 'timestamp', 'is_read']
-        read_only_fields = ['is_read']
+        fields = ['id', 'actor', 'actor_count', 'recent_actors', 'verb', 'target', 'timestamp', 'is_read']
+        read_only_fields = ['is_read', 'actor_count', 'recent_actors']
@@ -1,3 +1,268 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from posts.models import Comment, Post
+from social_media_api.compiled import compile_serializer
+from social_media_api.testing import QueryCountAssertionsMixin, malformed_cursors
+from .models import Notification
+from .serializers import NotificationSerializer
+from .dispatch import PendingNotification, ThreadedDispatcher
+from . import coalescing, retention, unread
+
+SYNC_DISPATCHER = {'BACKEND': 'notifications.dispatch.SyncDispatcher'}
+
+
+class NotificationListTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.recipient = User.objects.create_user(username='recipient', password='pass12345')
+        self.post = Post.objects.create(author=self.recipient, title='Hello', content='x')
+        self.counter = 0
+
+    def notify(self):
+        self.counter += 1
+        actor = get_user_model().objects.create(username=f'actor{self.counter}')
+        Notification.objects.create(recipient=self.recipient, actor=actor, verb='liked your post', target=self.post)
+
+    def test_list_renders_target(self):
+        self.notify()
+        self.client.force_authenticate(self.recipient)
+        response = self.client.get(reverse('notification_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['target'], 'Hello')
+
+    def test_list_queries_do_not_grow_with_notifications(self):
+        self.client.force_authenticate(self.recipient)
+        self.notify()
+        self.assertConstantQueries(lambda: self.client.get(reverse('notification_list')), self.notify)
+
+    def test_compiled_serializer_matches(self):
+        self.notify()
+        comment = Comment.objects.create(post=self.post, author=self.recipient, content='Reply')
+        Notification.objects.create(recipient=self.recipient, actor=self.recipient, verb='commented', target=comment,
+                                    actor_count=3, recent_actors=[3, 2, 1])
+        gone = Comment.objects.create(post=self.post, author=self.recipient, content='Deleted')
+        Notification.objects.create(recipient=self.recipient, actor=self.recipient, verb='commented', target=gone)
+        gone.delete()
+        queryset = Notification.objects.order_by('-id')
+        compiled = compile_serializer(NotificationSerializer)
+        data = compiled.serialize(compiled.values(queryset))
+        self.assertEqual([item['target'] for item in data], [None, str(comment), 'Hello'])
+        self.assertEqual(JSONRenderer().render(data),
+                         JSONRenderer().render(NotificationSerializer(queryset, many=True).data))
+
+        self.client.force_authenticate(self.recipient)
+        response = self.client.get(reverse('notification_list'))
+        with override_settings(COMPILED_SERIALIZERS=False):
+            self.assertEqual(response.content, self.client.get(reverse('notification_list')).content)
+
+
+@override_settings(NOTIFICATIONS_DISPATCHER=SYNC_DISPATCHER)
+class NotificationDeliveryTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.fan = User.objects.create_user(username='fan', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='x')
+        self.client.force_authenticate(self.fan)
+
+    def test_like_notifies_author_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(reverse('like_post', args=[self.post.pk]))
+            self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(callbacks), 2)  # The notification, and the post's ETag touch
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.actor, notification.target),
+                         (self.author, self.fan, self.post))
+
+    def test_follow_notifies_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('follow-user', args=[self.author.pk]))
+            self.client.post(reverse('follow-user', args=[self.author.pk]))
+        self.assertEqual(list(Notification.objects.values_list('recipient', 'verb')),
+                         [(self.author.pk, 'followed you')])
+
+
+class ThreadedDispatcherTests(TransactionTestCase):
+    def test_workers_write_queued_notifications_in_batches(self):
+        User = get_user_model()
+        recipient = User.objects.create(username='recipient')
+        actors = [User.objects.create(username=f'actor{i}') for i in range(5)]
+        dispatcher = ThreadedDispatcher(workers=1, batch_size=2, flush_interval=0.01)
+        dispatcher.enqueue([PendingNotification(recipient.pk, actor.pk, 'followed you', User, actor.pk)
+                            for actor in actors])
+        dispatcher.flush()
+        dispatcher.shutdown()
+        self.assertEqual(Notification.objects.filter(recipient=recipient).count(), 5)
+
+
+class CoalescingTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.recipient = User.objects.create(username='recipient')
+        self.post = Post.objects.create(author=self.recipient, title='Hello', content='x')
+        self.actors = [User.objects.create(username=f'actor{i}') for i in range(5)]
+
+    def like(self, actor):
+        return PendingNotification(self.recipient.pk, actor.pk, 'liked your post', Post, self.post.pk)
+
+    @override_settings(NOTIFICATIONS_RECENT_ACTORS=2)
+    def test_repeats_merge_into_one_row(self):
+        coalescing.deliver([self.like(actor) for actor in self.actors[:3]])
+        coalescing.deliver([self.like(self.actors[3])])
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.actor_id, self.actors[3].pk)
+        self.assertEqual(notification.recent_actors, [self.actors[3].pk, self.actors[2].pk])
+
+    def test_read_notifications_are_not_reopened(self):
+        coalescing.deliver([self.like(self.actors[0])])
+        Notification.objects.update(is_read=True)
+        coalescing.deliver([self.like(self.actors[1])])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_different_targets_stay_separate(self):
+        other = Post.objects.create(author=self.recipient, title='Other', content='x')
+        coalescing.deliver([
+            self.like(self.actors[0]),
+            PendingNotification(self.recipient.pk, self.actors[1].pk, 'liked your post', Post, other.pk),
+        ])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    @override_settings(NOTIFICATIONS_COALESCE_WINDOW=0)
+    def test_zero_window_disables_coalescing(self):
+        coalescing.deliver([self.like(actor) for actor in self.actors])
+        self.assertEqual(Notification.objects.count(), 5)
+
+
+class UnreadNotificationTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.recipient = User.objects.create(username='recipient')
+        self.posts = [Post.objects.create(author=self.recipient, title=f'P{i}', content='x') for i in range(4)]
+        actor = User.objects.create(username='actor')
+        coalescing.deliver([PendingNotification(self.recipient.pk, actor.pk, 'liked your post', Post, post.pk)
+                            for post in self.posts])
+        self.client.force_authenticate(self.recipient)
+
+    def unread_count(self):
+        return self.client.get(reverse('notification_unread_count')).data['unread_count']
+
+    def test_count_is_cached_and_follows_new_notifications(self):
+        self.assertEqual(self.unread_count(), 4)
+        self.assertMaxQueries(0, lambda: self.assertEqual(unread.unread_count(self.recipient.pk), 4))
+        actor = get_user_model().objects.create(username='another')
+        post = Post.objects.create(author=self.recipient, title='New', content='x')
+        coalescing.deliver([PendingNotification(self.recipient.pk, actor.pk, 'liked your post', Post, post.pk)])
+        self.assertEqual(self.unread_count(), 5)
+
+    def test_mark_all_read(self):
+        self.assertEqual(self.unread_count(), 4)
+        response = self.client.post(reverse('notification_mark_read'))
+        self.assertEqual(response.data, {'marked_read': 4, 'unread_count': 0})
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    def test_mark_read_between_since_and_cursor(self):
+        page = self.client.get(reverse('notification_list') + '?page_size=3')
+        cursor = parse_qs(urlparse(page.data['next']).query)['cursor'][0]
+        response = self.client.post(reverse('notification_mark_read'), {'since': page.data['since'], 'cursor': cursor})
+        self.assertEqual(response.data, {'marked_read': 3, 'unread_count': 1})
+        listed = [item['id'] for item in page.data['results']]
+        self.assertEqual(set(Notification.objects.filter(is_read=True).values_list('id', flat=True)), set(listed))
+        response = self.client.post(reverse('notification_mark_read'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_notification_delivered_after_listing_stays_unread(self):
+        page = self.client.get(reverse('notification_list') + '?page_size=2')
+        cursor = parse_qs(urlparse(page.data['next']).query)['cursor'][0]
+        actor = get_user_model().objects.create(username='latecomer')
+        post = Post.objects.create(author=self.recipient, title='Later', content='x')
+        coalescing.deliver([PendingNotification(self.recipient.pk, actor.pk, 'liked your post', Post, post.pk)])
+        late = Notification.objects.latest('id')
+        # A repeat on the oldest, never-listed notification coalesces into it and bumps it to now
+        coalescing.deliver([PendingNotification(self.recipient.pk, actor.pk, 'liked your post', Post, self.posts[0].pk)])
+        bumped = Notification.objects.get(target_object_id=self.posts[0].pk)
+        response = self.client.post(reverse('notification_mark_read'), {'since': page.data['since'], 'cursor': cursor})
+        self.assertEqual(response.data, {'marked_read': 2, 'unread_count': 3})
+        # Without a cursor: everything at or older than `since`, which the bump moved past
+        response = self.client.post(reverse('notification_mark_read'), {'since': page.data['since']})
+        self.assertEqual(response.data, {'marked_read': 1, 'unread_count': 2})
+        self.assertEqual(set(Notification.objects.filter(is_read=False).values_list('id', flat=True)),
+                         {late.pk, bumped.pk})
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.post(reverse('notification_mark_read'), {'since': '???'})
+        self.assertEqual(response.status_code, 400)
+        for cursor in malformed_cursors(2):
+            with self.subTest(cursor=cursor):
+                response = self.client.post(reverse('notification_mark_read'), {'since': cursor})
+                self.assertEqual(response.status_code, 400)
+                response = self.client.post(reverse('notification_mark_read'), {'since': cursor, 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                response = self.client.get(reverse('notification_list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class RetentionTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.recipient = User.objects.create(username='recipient')
+        actor = User.objects.create(username='actor')
+        post = Post.objects.create(author=self.recipient, title='Hello', content='x')
+        old = timezone.now() - timedelta(days=100)
+        rows = [
+            Notification.objects.create(recipient=self.recipient, actor=actor, verb='liked your post', target=post)
+            for _ in range(5)
+        ]
+        self.old_read, self.old_unread = rows[:3], rows[3]
+        Notification.objects.filter(pk__in=[n.pk for n in rows[:4]]).update(timestamp=old)
+        Notification.objects.filter(pk__in=[n.pk for n in self.old_read]).update(is_read=True)
+        Notification.objects.filter(pk=rows[4].pk).update(is_read=True)  # Recent: kept
+
+    def test_archives_then_deletes_only_old_read_notifications(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            output = StringIO()
+            call_command('archive_notifications', days=90, archive_dir=archive_dir, chunk_size=2, stdout=output)
+            self.assertIn('Archived 3 notification(s) in 2 chunk(s)', output.getvalue())
+            [archive] = Path(archive_dir).iterdir()
+            with gzip.open(archive, 'rt') as lines:
+                archived = [json.loads(line)['id'] for line in lines]
+        self.assertEqual(archived, [n.pk for n in self.old_read])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_runs_never_overwrite_an_archive(self):
+        now = timezone.now()
+        with tempfile.TemporaryDirectory() as archive_dir, mock.patch.object(retention.timezone, 'now', return_value=now):
+            first = retention.archive_read_notifications(archive_dir=archive_dir)
+            Notification.objects.filter(pk=self.old_unread.pk).update(is_read=True)
+            # Same timestamp and pid: the name collides and the run stops before deleting
+            with self.assertRaises(FileExistsError):
+                retention.archive_read_notifications(archive_dir=archive_dir)
+            with gzip.open(first.path, 'rt') as lines:
+                self.assertEqual(len(lines.readlines()), 3)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_dry_run_and_time_budget_leave_rows(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('archive_notifications', archive_dir=archive_dir, dry_run=True, stdout=StringIO())
+            output = StringIO()
+            call_command('archive_notifications', archive_dir=archive_dir, time_budget=0, stdout=output)
+            self.assertEqual(list(Path(archive_dir).iterdir()), [])
+        self.assertIn('Time budget reached', output.getvalue())
+        self.assertEqual(Notification.objects.count(), 5)
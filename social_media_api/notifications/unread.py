@@ -0,0 +1,50 @@
+"""
+Cached per-user unread notification counter.
+
+The count is computed once with an index-only COUNT on
+(recipient, is_read, timestamp) and then kept in the cache, adjusted in place
+when notifications are created or marked read. Paths that change rows in bulk
+without knowing the delta call `invalidate` and the next read recomputes it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+CACHE_PREFIX = 'notifications:unread:'
+
+
+def _key(user_id):
+    return f'{CACHE_PREFIX}{user_id}'
+
+
+def unread_count(user_id):
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.set(_key(user_id), count, getattr(settings, 'NOTIFICATIONS_UNREAD_CACHE_TTL', 3600))
+    return count
+
+
+def adjust(user_id, delta):
+    """Apply `delta` to a cached count; a missing count is left for the next read."""
+    if not delta:
+        return
+    try:
+        if cache.incr(_key(user_id), delta) < 0:
+            invalidate(user_id)
+    except ValueError:
+        pass
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def mark_read(user_id, queryset=None):
+    """Mark the user's unread notifications (optionally narrowed by `queryset`) read in one UPDATE."""
+    if queryset is None:
+        queryset = Notification.objects.all()
+    updated = queryset.filter(recipient_id=user_id, is_read=False).update(is_read=True)
+    adjust(user_id, -updated)
+    return updated
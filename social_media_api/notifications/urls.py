@@ -1,8 +1,10 @@
 # URL routing configuration for notifications app endpoints
 from django.urls import path
-from .views import NotificationListView
+from .views import NotificationListView, UnreadCountView, MarkReadView
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification_list'),
+    path('unread-count/', UnreadCountView.as_view(), name='notification_unread_count'),
+    path('mark-read/', MarkReadView.as_view(), name='notification_mark_read'),
     # Other notification routes...
 ]
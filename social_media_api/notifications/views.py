@@ -4,10 +4,57 @@ from django.shortcuts import render
 from rest_framework import generics, permissions
 from .models import Notification
 from .serializers import NotificationSerializer
+from social_media_api.compiled import CompiledListMixin
+from social_media_api.pagination import TimestampKeysetPagination
+from social_media_api.query_planner import QueryPlanMixin
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import unread
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(QueryPlanMixin, CompiledListMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = TimestampKeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user).order_by('-timestamp')
+
+
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': unread.unread_count(request.user.pk)})
+
+
+class MarkReadView(APIView):
+    """
+    Mark notifications read in a single UPDATE.
+
+    With no body every unread notification is marked read. `since` (from the
+    first list page read) and optionally `cursor` (the `next` cursor of the
+    last page read) limit it to the rows listed between them. Notifications
+    delivered after the listing, or coalesced since, are newer than `since`
+    and stay unread.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        queryset = Notification.objects.all()
+        since, cursor = request.data.get('since'), request.data.get('cursor')
+        if cursor and not since:
+            raise ValidationError({'since': 'This field is required with a cursor.'})
+        paginator = TimestampKeysetPagination()
+        if since:
+            queryset = queryset.filter(paginator.get_seen_filter(self.position(paginator, since, 'since')))
+        if cursor:
+            queryset = queryset.exclude(paginator.get_position_filter(self.position(paginator, cursor, 'cursor')))
+        updated = unread.mark_read(request.user.pk, queryset)
+        return Response({'marked_read': updated, 'unread_count': unread.unread_count(request.user.pk)})
+
+    def position(self, paginator, encoded, field):
+        try:
+            return paginator.parse_cursor(encoded, Notification)
+        except NotFound:
+            raise ValidationError({field: paginator.invalid_cursor_message})
@@ -0,0 +1,66 @@
+"""
+Denormalized like/comment counters on Post.
+
+Counters are adjusted with a single `UPDATE ... SET n = n + 1` so concurrent
+requests never lose increments, and never drop below zero if they have
+drifted. `reconcile` recomputes them from the Like/Comment tables.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from social_media_api.conditional import touch
+
+from .models import Comment, Like, Post
+
+
+def _adjust(post_id, field, delta):
+    if delta >= 0:
+        value = F(field) + delta
+    else:
+        value = Greatest(F(field) + delta, Value(0))
+    touch(Post, post_id)  # updated_at does not move
+    return Post.objects.filter(pk=post_id).update(**{field: value})
+
+
+def adjust_like_count(post_id, delta):
+    return _adjust(post_id, 'like_count', delta)
+
+
+def adjust_comment_count(post_id, delta):
+    return _adjust(post_id, 'comment_count', delta)
+
+
+def _count_of(model):
+    rows = (model.objects.filter(post=OuterRef('pk')).order_by()
+            .values('post').annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def with_actual_counts(queryset):
+    return queryset.annotate(actual_like_count=_count_of(Like), actual_comment_count=_count_of(Comment))
+
+
+def reconcile(batch_size=1000, dry_run=False):
+    """
+    Walk posts in primary-key batches and rewrite counters that drifted.
+    Yields `(batch_last_pk, scanned, repaired)` after each batch.
+    """
+    last_pk = 0
+    while True:
+        pks = list(Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                   .values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        last_pk = pks[-1]
+        drifted = list(
+            with_actual_counts(Post.objects.filter(pk__in=pks))
+            .filter(~Q(like_count=F('actual_like_count')) | ~Q(comment_count=F('actual_comment_count')))
+            .only('pk', 'like_count', 'comment_count')
+        )
+        for post in drifted:
+            post.like_count = post.actual_like_count
+            post.comment_count = post.actual_comment_count
+        if drifted and not dry_run:
+            Post.objects.bulk_update(drifted, ['like_count', 'comment_count'])
+            touch(Post, *[post.pk for post in drifted])
+        yield last_pk, len(pks), len(drifted)
@@ -0,0 +1,75 @@
+"""
+Django Management Command to benchmark feed reads
+Compares the materialized home timeline against the original pull query
+(`Post.objects.filter(author__in=following_users)`). Synthetic data is created
+inside a transaction that is rolled back, so the database is left untouched.
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from posts.models import Post
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Benchmark materialized timelines against the pull-at-read feed query'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--follows', type=int, default=100, help='Accounts followed per user')
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--reads', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        User = get_user_model()
+        Follow = User.followers.through
+        rng = random.Random(42)
+
+        self.stdout.write('Seeding synthetic data...')
+        users = User.objects.bulk_create(
+            [User(username=f'bench_feed_{i}', password='!') for i in range(options['users'])]
+        )
+        user_ids = [user.pk for user in users]
+        follows = set()
+        for user_id in user_ids:
+            for author_id in rng.sample(user_ids, min(options['follows'], len(user_ids))):
+                if author_id != user_id:
+                    follows.add((author_id, user_id))
+        Follow.objects.bulk_create(
+            [Follow(from_customuser_id=author, to_customuser_id=follower) for author, follower in follows],
+            batch_size=5000,
+        )
+        Post.objects.bulk_create(
+            [Post(author_id=rng.choice(user_ids), title=f'Post {i}', content='benchmark')
+             for i in range(options['posts'])],
+            batch_size=5000,
+        )
+        for user_id in user_ids:
+            timeline.rebuild_timeline(user_id)
+
+        readers = [users[rng.randrange(len(users))] for _ in range(options['reads'])]
+        page = options['page_size']
+
+        def pull(user):
+            return list(Post.objects.filter(author__in=user.following_users.all())
+                        .order_by('-created_at')[:page])
+
+        def materialized(user):
+            return list(timeline.home_timeline_page(user, page))
+
+        for label, read in (('pull-at-read', pull), ('materialized', materialized)):
+            started = time.perf_counter()
+            for user in readers:
+                read(user)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label:>14}: {elapsed / len(readers) * 1000:.3f} ms per feed page')
@@ -0,0 +1,77 @@
+"""
+Django Management Command to benchmark post search
+Compares the full-text index (posts/search.py) against the `icontains` scans
+DRF's SearchFilter issued, for whole-word and prefix queries. Synthetic posts
+are created inside a transaction that is rolled back, so the database is left
+untouched.
+"""
+
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from posts.models import Post
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text post search against icontains scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--vocabulary', type=int, default=20000, help='Distinct synthetic words')
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--page-size', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        rng = random.Random(42)
+        words = list({
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+            for _ in range(options['vocabulary'])
+        })
+
+        def sentence(length):
+            return ' '.join(rng.choice(words) for _ in range(length))
+
+        self.stdout.write(f"Seeding {options['posts']} synthetic posts...")
+        author = get_user_model().objects.create(username='bench_search', password='!')
+        batch = 5000
+        for start in range(0, options['posts'], batch):
+            Post.objects.bulk_create([
+                Post(author=author, title=sentence(6), content=sentence(40))
+                for _ in range(min(batch, options['posts'] - start))
+            ])
+
+        search.rebuild_index()  # Merge the segments the bulk insert left behind
+
+        posts = Post.objects.filter(author=author)
+        page = options['page_size']
+        queries = [rng.choice(words) for _ in range(options['queries'])]
+        prefixes = [word[:4] for word in queries]
+
+        def scan(query):
+            return list(posts.filter(Q(title__icontains=query) | Q(content__icontains=query))
+                        .order_by('-created_at', '-id')[:page])
+
+        def indexed(query):
+            return list(search.search(posts, query).order_by('-search_rank', '-id')[:page])
+
+        for label, run, inputs in (
+            ('icontains', scan, queries),
+            ('full-text', indexed, queries),
+            ('full-text prefix', indexed, prefixes),
+        ):
+            started = time.perf_counter()
+            for query in inputs:
+                run(query)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label:>17}: {elapsed / len(inputs) * 1000:.3f} ms per search page')
@@ -0,0 +1,90 @@
+"""
+Django Management Command to benchmark compiled read serializers
+Serializes the same rows of posts, comments and notifications through the
+ModelSerializers (with the query planner's joins and prefetches) and through
+their compiled `values()` form, and reports the throughput of each as the time
+per 10k rows. The outputs are compared, so a mismatch fails the run.
+Synthetic data is created inside a transaction that is rolled back, so the
+database is left untouched.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from posts.models import Comment, Post
+from posts.serializers import CommentSerializer, PostSerializer
+from social_media_api.compiled import compile_serializer
+from social_media_api.query_planner import plan_queryset
+
+
+class Command(BaseCommand):
+    help = 'Compare serialization throughput of ModelSerializers and their compiled form'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows of each model to serialize')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best one is reported')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        rows = options['rows']
+        User = get_user_model()
+        self.stdout.write(f'Seeding {rows} synthetic posts, comments and notifications...')
+        author = User.objects.create(username='bench_serializer_author', password='!')
+        reader = User.objects.create(username='bench_serializer_reader', password='!')
+        batch = 5000
+        posts = []
+        for start in range(0, rows, batch):
+            posts += Post.objects.bulk_create([
+                Post(author=author, title=f'Post {start + i}', content='benchmark ' * 20)
+                for i in range(min(batch, rows - start))
+            ])
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=reader, content='benchmark comment') for post in posts], batch_size=batch
+        )
+        post_type = ContentType.objects.get_for_model(Post)
+        Notification.objects.bulk_create([
+            Notification(recipient=author, actor=reader, verb='liked your post',
+                         target_content_type=post_type, target_object_id=post.pk, recent_actors=[reader.pk])
+            for post in posts
+        ], batch_size=batch)
+
+        cases = (
+            ('PostSerializer', PostSerializer, Post.objects.filter(author=author).order_by('-id')),
+            ('CommentSerializer', CommentSerializer, Comment.objects.filter(author=reader).order_by('-id')),
+            ('NotificationSerializer', NotificationSerializer,
+             Notification.objects.filter(recipient=author).order_by('-id')),
+        )
+        for label, serializer_class, queryset in cases:
+            compiled = compile_serializer(serializer_class)
+            plain_time, plain = self.measure(
+                lambda: serializer_class(plan_queryset(queryset, serializer_class()), many=True).data,
+                options['repeat'])
+            compiled_time, fast = self.measure(lambda: compiled.serialize(compiled.values(queryset)),
+                                               options['repeat'])
+            if JSONRenderer().render(plain) != JSONRenderer().render(fast):
+                raise CommandError(f'{label}: the compiled output differs')
+            per_10k = 10000 / max(len(plain), 1)
+            self.stdout.write(
+                f'{label:>22}: serializer {plain_time * per_10k:.2f}s, compiled {compiled_time * per_10k:.2f}s '
+                f'per 10k rows ({plain_time / compiled_time:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Compiled serializers produced identical output'))
+
+    def measure(self, serialize, repeat):
+        best, data = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
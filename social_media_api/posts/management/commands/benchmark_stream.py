@@ -0,0 +1,110 @@
+"""
+Django Management Command to benchmark streamed list responses
+Renders a long unpaginated feed (UserFeedView) both ways: buffered, i.e.
+`serializer.data` rendered by JSONRenderer, and streamed through
+StreamingJSONResponse. Each run happens in a forked child process so its peak
+RSS can be read on its own. Synthetic data is created inside a transaction
+that is rolled back, so the database is left untouched.
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from posts.models import Comment, Post, TimelineEntry
+from posts.serializers import PostSerializer
+from posts.timeline import home_timeline
+from social_media_api.query_planner import plan_queryset
+from social_media_api.streaming import StreamingJSONResponse
+
+
+class Command(BaseCommand):
+    help = 'Compare peak memory of buffered and streamed feed responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=2, help='Comments per post')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            raise CommandError('This benchmark measures each run in a forked process and needs os.fork')
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        User = get_user_model()
+        self.stdout.write(f"Seeding {options['posts']} synthetic posts...")
+        author = User.objects.create(username='bench_stream_author', password='!')
+        reader = User.objects.create(username='bench_stream_reader', password='!')
+        author.followers.add(reader)
+        batch = 5000
+        for start in range(0, options['posts'], batch):
+            posts = Post.objects.bulk_create([
+                Post(author=author, title=f'Post {start + i}', content='benchmark ' * 40)
+                for i in range(min(batch, options['posts'] - start))
+            ])
+            TimelineEntry.objects.bulk_create(
+                [TimelineEntry(user=reader, post=post, created_at=post.created_at) for post in posts]
+            )
+            Comment.objects.bulk_create([
+                Comment(post=post, author=reader, content='benchmark comment')
+                for post in posts for _ in range(options['comments'])
+            ])
+
+        def feed():
+            return plan_queryset(home_timeline(reader), PostSerializer())
+
+        def buffered():
+            return len(JSONRenderer().render(PostSerializer(feed(), many=True).data))
+
+        def streamed():
+            response = StreamingJSONResponse(PostSerializer(), feed(), chunk_size=options['chunk_size'])
+            return sum(len(chunk) for chunk in response.streaming_content)
+
+        results = {}
+        for label, render in (('buffered', buffered), ('streamed', streamed)):
+            results[label] = self.measure(render)
+            size, elapsed, growth = results[label]
+            self.stdout.write(f'{label:>9}: {size / 1e6:.1f} MB of JSON in {elapsed:.2f}s, '
+                              f'peak RSS +{growth / 1e6:.1f} MB')
+        if results['buffered'][0] != results['streamed'][0]:
+            raise CommandError('The two responses differ in size')
+        saved = results['buffered'][2] - results['streamed'][2]
+        self.stdout.write(self.style.SUCCESS(f'Streaming saved {saved / 1e6:.1f} MB of peak RSS'))
+
+    def measure(self, render):
+        """Run `render` in a child process; returns (bytes rendered, seconds, peak RSS growth in bytes)."""
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        unit = 1 if sys.platform == 'darwin' else 1024
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            try:
+                before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                started = time.perf_counter()
+                size = render()
+                elapsed = time.perf_counter() - started
+                growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * unit
+                os.write(write, json.dumps([size, elapsed, growth]).encode())
+            except Exception:
+                traceback.print_exc()
+            finally:
+                # Skip cleanup: the parent still owns the database connection
+                os._exit(0)
+        os.close(write)
+        os.waitpid(pid, 0)
+        with os.fdopen(read) as pipe:
+            output = pipe.read()
+        if not output:
+            raise CommandError('The benchmark child process failed')
+        return json.loads(output)
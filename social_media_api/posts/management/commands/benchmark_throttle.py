@@ -0,0 +1,67 @@
+"""
+Django Management Command to benchmark throttle overhead
+Times `allow_request()` for the sliding-window throttle against DRF's
+ScopedRateThrottle (timestamp history in the cache) over synthetic requests
+from many users. No database access is needed.
+"""
+
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import ScopedRateThrottle
+from social_media_api.throttling import SlidingWindowThrottle, get_store
+
+BUDGET_US = 100
+
+
+class BenchmarkUser(AnonymousUser):
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = self.id = pk
+
+
+class BenchmarkView:
+    throttle_scope = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request throttle overhead (target: under 100µs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--rate', default='1000/min', help='Rate for the benchmark scope')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(options['users']):
+            request = Request(factory.post('/api/posts/1/like/'))
+            request.user = BenchmarkUser(i + 1)
+            requests.append(request)
+        view = BenchmarkView()
+        rates = {'benchmark': options['rate']}
+
+        class Sliding(SlidingWindowThrottle):
+            def get_rate(self):
+                return rates[self.scope]
+
+        class Scoped(ScopedRateThrottle):
+            THROTTLE_RATES = rates
+
+        get_store().clear()
+        for label, throttle_class in (('sliding-window', Sliding), ('drf-scoped', Scoped)):
+            started = time.perf_counter()
+            denied = 0
+            for n in range(options['requests']):
+                if not throttle_class().allow_request(requests[n % len(requests)], view):
+                    denied += 1
+            elapsed = time.perf_counter() - started
+            per_request = elapsed / options['requests'] * 1e6
+            style = self.style.SUCCESS if per_request < BUDGET_US else self.style.WARNING
+            self.stdout.write(style(f'{label:>15}: {per_request:.1f} µs per request ({denied} denied)'))
+        get_store().clear()
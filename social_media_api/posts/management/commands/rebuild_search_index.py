@@ -0,0 +1,19 @@
+"""
+Django Management Command to rebuild the post full-text search index
+The index follows post writes on its own (see posts/search.py); rebuild it
+after restoring a backup or loading rows with raw SQL outside Django.
+"""
+
+from django.core.management.base import BaseCommand
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over post titles and content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        search.rebuild_index(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Rebuilt the post search index'))
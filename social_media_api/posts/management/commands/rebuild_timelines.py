@@ -0,0 +1,32 @@
+"""
+Django Management Command to rebuild materialized home timelines
+Recomputes TimelineEntry rows from the posts and follow tables, e.g. after
+importing data with bulk_create (which skips the fan-out signals) or after
+changing TIMELINE_MAX_LENGTH.
+"""
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized home timelines for all users or the given user ids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Rebuild only this user id (may be repeated)')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        rebuilt = entries = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            entries += timeline.rebuild_timeline(user_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rebuilt} timeline(s) with {entries} entries'
+        ))
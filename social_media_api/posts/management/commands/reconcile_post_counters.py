@@ -0,0 +1,31 @@
+"""
+Django Management Command to reconcile denormalized post counters
+Recomputes Post.like_count and Post.comment_count from the Like and Comment
+tables in primary-key batches and rewrites only the rows that drifted.
+"""
+
+from django.core.management.base import BaseCommand
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in Post.like_count / Post.comment_count in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        scanned = repaired = 0
+        for last_pk, batch_scanned, batch_repaired in counters.reconcile(
+            batch_size=options['batch_size'], dry_run=options['dry_run']
+        ):
+            scanned += batch_scanned
+            repaired += batch_repaired
+            if options['verbosity'] > 1:
+                self.stdout.write(f'   up to post {last_pk}: {batch_repaired} drifted')
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {repaired} drifted post(s) out of {scanned} scanned'
+        ))
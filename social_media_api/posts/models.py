@@ -8,6 +8,17 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, kept in step with Like/Comment rows via F() updates
+    # (see posts/counters.py) and repaired by `reconcile_post_counters`.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_post_recent'),  # Keyset pagination
+            models.Index(fields=['title'], name='posts_post_title'),  # ?title= exact filter
+        ]
+        # Full-text search index: see posts/search.py (created in migration 0007)
 
     def __str__(self):
         return self.title
@@ -19,6 +30,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_comment_recent'),  # Keyset pagination
+            models.Index(fields=['post', '-created_at', '-id'], name='posts_comment_post_recent'),  # Per-post previews/pages
+        ]
+
     def __str__(self):
         return f'Comment by {self.author} on {self.post}'
 
@@ -29,3 +46,41 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('user', 'post')  # Prevent multiple likes by the same user on the same post
+
+
+class TimelineEntry(models.Model):
+    """
+    One post materialized into a user's home timeline.
+
+    Rows are written when a followed author publishes (fan-out-on-write) so a
+    feed read is a single indexed slice on (user, created_at) instead of a scan
+    over every post by every followed author. `created_at` mirrors the post's
+    own timestamp so the timeline can be ordered without joining posts.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='timeline_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='timeline_entries', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')  # A post appears at most once per timeline
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='posts_timeline_user_recent'),
+        ]
+
+    def __str__(self):
+        return f'{self.post} in timeline of {self.user}'
+
+
+class PostSearchIndex(models.Model):
+    """
+    Read-only view of the SQLite FTS5 table that indexes post titles and
+    content (see posts/search.py). Lets searches join it to `posts_post`.
+    """
+    post = models.OneToOneField(Post, primary_key=True, db_column='rowid', db_constraint=False,
+                                related_name='search_index', on_delete=models.DO_NOTHING)
+    title = models.TextField()
+    content = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
@@ -0,0 +1,92 @@
+"""
+Full-text search over post titles and content.
+
+`?search=` used to be DRF's SearchFilter, i.e. `LIKE '%term%'` scans of the
+whole posts table. It is now answered from a full-text index:
+
+* SQLite: an external-content FTS5 table `posts_post_fts` kept in step with
+  `posts_post` by triggers (so saves, deletes and bulk writes are indexed as
+  they happen) and ranked with bm25().
+* PostgreSQL: a GIN expression index over a weighted tsvector of the two
+  columns, ranked with ts_rank().
+
+Every search term is matched as a prefix ("djan" finds "django"); title matches
+weigh more than content matches. Other databases fall back to `icontains`.
+The index is created by migration 0007 and can be rebuilt with
+`python manage.py rebuild_search_index`.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+FTS_TABLE = 'posts_post_fts'
+PG_INDEX = 'posts_post_search'
+PG_CONFIG = 'english'
+TITLE_WEIGHT = 4.0  # Relative to content
+
+# Must match the expression of the index created in migration 0007
+PG_VECTOR = (
+    f"(setweight(to_tsvector('{PG_CONFIG}', coalesce(\"posts_post\".\"title\", '')), 'A') || "
+    f"setweight(to_tsvector('{PG_CONFIG}', coalesce(\"posts_post\".\"content\", '')), 'B'))"
+)
+
+
+def terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def rebuild_index(using='default'):
+    """Re-index every post from scratch (e.g. after restoring a backup)."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'REINDEX INDEX {PG_INDEX}')
+
+
+def search(queryset, query):
+    """
+    Filter a Post queryset to matches for `query`, annotated with
+    `search_rank` (higher is more relevant).
+    """
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        # Each word as a quoted prefix term, all required. The join through
+        # Post.search_index puts the FTS table in the FROM clause, which both
+        # MATCH and bm25() need.
+        match = ' '.join(f'"{word}"*' for word in words)
+        return (
+            queryset.filter(search_index__isnull=False)
+            .filter(RawSQL(f'{FTS_TABLE} MATCH %s', [match], output_field=BooleanField()))
+            .annotate(search_rank=RawSQL(f'-bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0)', [],
+                                         output_field=FloatField()))
+        )
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        matches = RawSQL(f"{PG_VECTOR} @@ to_tsquery('{PG_CONFIG}', %s)", [tsquery], output_field=BooleanField())
+        rank = RawSQL(f"ts_rank({PG_VECTOR}, to_tsquery('{PG_CONFIG}', %s))", [tsquery],
+                      output_field=FloatField())
+        return queryset.alias(search_match=matches).filter(search_match=True).annotate(search_rank=rank)
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(content__icontains=word)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Drop-in for SearchFilter on the post list: `?search=<terms>`."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search(queryset, query)
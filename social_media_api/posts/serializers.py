@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db import models
 from rest_framework import serializers
 from .models import Post, Comment
 
@@ -6,12 +8,50 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ['id', 'author', 'content', 'created_at', 'updated_at']
+        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
+
+class CommentPreviewSerializer(serializers.ListSerializer):
+    """
+    The latest `COMMENT_PREVIEW_SIZE` comments of a post, newest first.
+
+    The query planner fetches the previews for a whole page of posts in one
+    window-function query via `get_prefetch_queryset`, stored on
+    `prefetch_to_attr`; unplanned querysets are bounded here instead.
+    """
+    ordering = ('-created_at', '-id')
+    prefetch_to_attr = 'comment_preview'
+
+    @property
+    def preview_size(self):
+        return getattr(settings, 'COMMENT_PREVIEW_SIZE', 3)
+
+    def get_prefetch_queryset(self, queryset):
+        return queryset.order_by(*self.ordering)[:self.preview_size]
+
+    def get_attribute(self, instance):
+        if hasattr(instance, self.prefetch_to_attr):
+            return getattr(instance, self.prefetch_to_attr)
+        return super().get_attribute(instance)
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if isinstance(data, models.QuerySet) and data._result_cache is None:
+            data = self.get_prefetch_queryset(data)
+        return super().to_representation(data)
+
 
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = CommentPreviewSerializer(child=CommentSerializer(), read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments']
+        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at',
+                  'like_count', 'comment_count', 'comments']
+        read_only_fields = ['like_count', 'comment_count']
+
+
+class PostDetailSerializer(PostSerializer):
+    """Post with its full comment list, for `?comments=all` on the detail view."""
+    comments = CommentSerializer(many=True, read_only=True)
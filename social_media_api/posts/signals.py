@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from social_media_api.conditional import touch
+from .models import Comment, Post
+from . import timeline
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_commented_post(sender, instance, raw=False, **kwargs):
+    # Posts embed a preview of their latest comments
+    if not raw:
+        touch(Post, instance.post_id)
+
+
+def _follow_pairs(instance, reverse, pk_set):
+    # author.followers.add(user) arrives with the author as instance,
+    # user.following_users.add(author) arrives reversed with the follower.
+    if reverse:
+        return [(instance.pk, author_id) for author_id in pk_set]
+    return [(follower_id, instance.pk) for follower_id in pk_set]
+
+
+@receiver(m2m_changed, sender=get_user_model().followers.through)
+def sync_timelines_on_follow(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            pk_set = timeline.following_ids(instance.pk)
+        else:
+            pk_set = timeline.follower_ids(instance.pk)
+        action = 'post_remove'
+    if action == 'post_add':
+        for follower_id, author_id in _follow_pairs(instance, reverse, pk_set):
+            timeline.backfill_timeline(follower_id, author_id)
+    elif action == 'post_remove':
+        for follower_id, author_id in _follow_pairs(instance, reverse, pk_set):
+            timeline.remove_author_from_timeline(follower_id, author_id)
@@ -1,3 +1,521 @@
-from django.test import TestCase
+import json
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from social_media_api.compiled import CompiledSerializer, compile_serializer
+from social_media_api.query_planner import plan_queryset
+from social_media_api.testing import QueryCountAssertionsMixin, malformed_cursors, response_json
+from social_media_api.throttling import LocalWindowStore, SlidingWindowThrottle, get_store
+from .models import Comment, Like, Post, TimelineEntry
+from .serializers import CommentSerializer, PostSerializer
+from . import search, timeline
+
+
+class TimelineTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.reader.following_users.add(self.author)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.author).exists())
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        other = get_user_model().objects.create_user(username='other', password='pass12345')
+        post = Post.objects.create(author=other, title='Earlier', content='Post')
+        self.reader.following_users.add(other)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.reader.following_users.remove(other)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+    @override_settings(TIMELINE_MAX_LENGTH=2, TIMELINE_TRIM_SLACK=0)
+    def test_timeline_is_capped(self):
+        posts = [Post.objects.create(author=self.author, title=f'P{i}', content='x') for i in range(4)]
+        kept = set(TimelineEntry.objects.filter(user=self.reader).values_list('post_id', flat=True))
+        self.assertEqual(kept, {posts[2].pk, posts[3].pk})
+
+    @override_settings(TIMELINE_MAX_LENGTH=2, TIMELINE_TRIM_SLACK=2)
+    def test_fan_out_trims_only_past_the_slack(self):
+        posts = [Post.objects.create(author=self.author, title=f'P{i}', content='x') for i in range(4)]
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 4)
+        posts.append(Post.objects.create(author=self.author, title='P4', content='x'))
+        kept = set(TimelineEntry.objects.filter(user=self.reader).values_list('post_id', flat=True))
+        self.assertEqual(kept, {posts[3].pk, posts[4].pk})
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_feed_page_merges_pulled_authors_with_the_timeline(self):
+        User = get_user_model()
+        User.objects.create_user(username='fan', password='pass12345').following_users.add(self.author)
+        other = User.objects.create_user(username='other', password='pass12345')
+        self.reader.following_users.add(other)
+        posts = []
+        for i in range(3):
+            posts.append(Post.objects.create(author=other, title=f'Pushed {i}', content='x'))
+            posts.append(Post.objects.create(author=self.author, title=f'Pulled {i}', content='x'))
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 3)
+        expected = list(timeline.home_timeline(self.reader))
+        self.assertEqual(expected, posts[::-1])
+        page = list(timeline.home_timeline_page(self.reader, 4))
+        self.assertEqual(page, expected[:4])
+        rest = list(timeline.home_timeline_page(self.reader, 10, after=(page[-1].created_at, page[-1].id)))
+        self.assertEqual(rest, expected[4:])
+
+        self.client.force_authenticate(self.reader)
+        titles, url = [], reverse('feed') + '?page_size=4'
+        while url:
+            data = response_json(self.client.get(url))
+            titles += [post['title'] for post in data['posts']]
+            url = data['next']
+        self.assertEqual(titles, [post.title for post in expected])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_high_fanout_author_is_pulled_at_read(self):
+        cache.clear()
+        post = Post.objects.create(author=self.author, title='Popular', content='x')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(list(timeline.home_timeline(self.reader)), [post])
+
+    def test_rebuild_matches_pull_query(self):
+        Post.objects.bulk_create([Post(author=self.author, title=f'B{i}', content='x') for i in range(3)])
+        timeline.rebuild_timeline(self.reader.pk)
+        expected = Post.objects.filter(author__in=self.reader.following_users.all()).order_by('-created_at', '-id')
+        self.assertEqual(list(timeline.home_timeline(self.reader)), list(expected))
+
+    def test_feed_view_reads_timeline(self):
+        Post.objects.create(author=self.author, title='Hello', content='World')
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, 200)
+        data = response_json(response)
+        self.assertEqual(data['following_count'], 1)
+        self.assertEqual([p['title'] for p in data['posts']], ['Hello'])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(username='author', password='pass12345')
+        self.posts = [Post.objects.create(author=self.author, title=f'P{i}', content='x') for i in range(5)]
+
+    def test_cursor_walks_every_post_once_newest_first(self):
+        titles = []
+        url = reverse('post-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            titles += [post['title'] for post in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, [f'P{i}' for i in reversed(range(5))])
+
+    def test_approximate_total_is_opt_in(self):
+        response = self.client.get(reverse('post-list') + '?include_total=true')
+        self.assertEqual(response.data['approximate_count'], 5)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('post-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+        reader = get_user_model().objects.create_user(username='reader', password='pass12345')
+        self.client.force_authenticate(reader)
+        for cursor in malformed_cursors(2):
+            for url in (reverse('post-list'), reverse('feed')):
+                with self.subTest(url=url, cursor=cursor):
+                    self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 404)
+
+    def test_feed_is_paginated(self):
+        reader = get_user_model().objects.create_user(username='reader', password='pass12345')
+        reader.following_users.add(self.author)
+        self.client.force_authenticate(reader)
+        data = response_json(self.client.get(reverse('feed') + '?page_size=3'))
+        self.assertEqual(len(data['posts']), 3)
+        data = response_json(self.client.get(data['next']))
+        self.assertEqual([p['title'] for p in data['posts']], ['P1', 'P0'])
+        self.assertIsNone(data['next'])
+
+
+class QueryPlanTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.counter = 0
+
+    def add_post_with_comments(self):
+        self.counter += 1
+        author = get_user_model().objects.create(username=f'author{self.counter}')
+        self.reader.following_users.add(author)
+        post = Post.objects.create(author=author, title=f'P{self.counter}', content='x')
+        for i in range(2):
+            commenter = get_user_model().objects.create(username=f'c{self.counter}_{i}')
+            Comment.objects.create(post=post, author=commenter, content='nice')
+
+    def test_post_list_queries_do_not_grow_with_posts(self):
+        self.add_post_with_comments()
+        self.assertConstantQueries(lambda: self.client.get(reverse('post-list')), self.add_post_with_comments)
+
+    def test_comment_list_queries_do_not_grow_with_comments(self):
+        self.add_post_with_comments()
+        self.assertConstantQueries(lambda: self.client.get(reverse('comment-list')), self.add_post_with_comments)
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        self.client.force_authenticate(self.reader)
+        self.add_post_with_comments()
+        self.assertConstantQueries(lambda: self.client.get(reverse('feed')), self.add_post_with_comments)
+
+
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.fan = User.objects.create_user(username='fan', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='x')
+        self.client.force_authenticate(self.fan)
+
+    def test_like_and_unlike_adjust_like_count(self):
+        self.client.post(reverse('like_post', args=[self.post.pk]))
+        self.client.post(reverse('like_post', args=[self.post.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.client.delete(reverse('unlike_post', args=[self.post.pk]))
+        self.client.delete(reverse('unlike_post', args=[self.post.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete_adjust_comment_count(self):
+        response = self.client.post(reverse('comment-list'), {'post': self.post.pk, 'content': 'Nice'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(reverse('post-detail', args=[self.post.pk])).data['comment_count'], 1)
+        self.client.delete(reverse('comment-detail', args=[response.data['id']]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        Comment.objects.create(post=self.post, author=self.fan, content='Untracked')
+        Post.objects.filter(pk=self.post.pk).update(like_count=7)
+        call_command('reconcile_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 1))
+
+
+@override_settings(COMMENT_PREVIEW_SIZE=2)
+class CommentPreviewTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(username='author', password='pass12345')
+        self.posts = [Post.objects.create(author=self.author, title=f'P{i}', content='x') for i in range(3)]
+        for post in self.posts:
+            for i in range(4):
+                Comment.objects.create(post=post, author=self.author, content=f'{post.title}-C{i}')
+
+    def test_list_embeds_latest_comments_only(self):
+        response = self.client.get(reverse('post-list'))
+        for post in response.data['results']:
+            self.assertEqual([c['content'] for c in post['comments']],
+                             [f"{post['title']}-C3", f"{post['title']}-C2"])
+
+    def test_previews_for_a_page_cost_one_query(self):
+        # posts + comment previews (one window query); authors are joined in
+        self.assertMaxQueries(2, self.client.get, reverse('post-list'))
+
+    def test_detail_can_opt_into_full_comment_list(self):
+        url = reverse('post-detail', args=[self.posts[0].pk])
+        self.assertEqual(len(self.client.get(url).data['comments']), 2)
+        self.assertEqual(len(self.client.get(url + '?comments=all').data['comments']), 4)
+
+    def test_post_comments_endpoint_is_paginated(self):
+        url = reverse('post_comments', args=[self.posts[0].pk]) + '?page_size=3'
+        response = self.client.get(url)
+        self.assertEqual([c['content'] for c in response.data['results']], ['P0-C3', 'P0-C2', 'P0-C1'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([c['content'] for c in response.data['results']], ['P0-C0'])
+        self.assertEqual(self.client.get(reverse('post_comments', args=[999])).status_code, 404)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'likes': '2/min'},
+})
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        get_store().clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='liker', password='pass12345')
+        self.other = User.objects.create_user(username='other', password='pass12345')
+        self.posts = [Post.objects.create(author=self.other, title=f'P{i}', content='x') for i in range(3)]
+
+    def tearDown(self):
+        get_store().clear()
+
+    def test_like_endpoint_is_throttled_per_user(self):
+        self.client.force_authenticate(self.user)
+        for post in self.posts[:2]:
+            self.assertEqual(self.client.post(reverse('like_post', args=[post.pk])).status_code, 201)
+        response = self.client.post(reverse('like_post', args=[self.posts[2].pk]))
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(Like.objects.filter(post=self.posts[2]).exists())
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.post(reverse('like_post', args=[self.posts[2].pk])).status_code, 201)
+
+    def test_sliding_window_weights_the_previous_window(self):
+        store = LocalWindowStore()
+        for _ in range(10):
+            self.assertTrue(store.hit('k', 10, 60, 59.0)[0])
+        # One second into the next window nearly all of the previous ten still count
+        allowed, wait = store.hit('k', 10, 60, 61.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 5.0)
+        self.assertTrue(store.hit('k', 10, 60, 66.0)[0])
+        self.assertFalse(store.hit('k', 10, 60, 66.0)[0])
+        # Two windows later nothing carries over
+        self.assertTrue(all(store.hit('k', 10, 60, 200.0)[0] for _ in range(10)))
+
+    def test_benchmark_command_runs(self):
+        out = StringIO()
+        call_command('benchmark_throttle', '--requests', '200', '--users', '10', '--rate', '5/min', stdout=out)
+        self.assertIn('sliding-window', out.getvalue())
+        self.assertIn('(150 denied)', out.getvalue())
+
+    def test_views_without_scope_are_not_throttled(self):
+        class View:
+            pass
+        self.assertTrue(SlidingWindowThrottle().allow_request(None, View()))
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(username='author', password='pass12345')
+        self.in_title = Post.objects.create(author=self.author, title='Django tips', content='Some notes')
+        self.in_content = Post.objects.create(author=self.author, title='Notes',
+                                              content='Using Django with a full-text index')
+        Post.objects.create(author=self.author, title='Cooking', content='Pasta and sauce')
+
+    def titles(self, query, **params):
+        response = self.client.get(reverse('post-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [post['title'] for post in response.data['results']], response.data['next']
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.titles('django')[0], ['Django tips', 'Notes'])
+
+    def test_prefix_and_multiple_terms(self):
+        self.assertEqual(self.titles('djan')[0], ['Django tips', 'Notes'])
+        self.assertEqual(self.titles('djan ful')[0], ['Notes'])
+        self.assertEqual(self.titles('!!!')[0], [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.title = 'Flask tips'
+        self.in_title.save()
+        self.assertEqual(self.titles('flask')[0], ['Flask tips'])
+        self.assertEqual(self.titles('django')[0], ['Notes'])
+        self.in_content.delete()
+        self.assertEqual(self.titles('django')[0], [])
+
+    def test_ranked_results_are_cursor_paginated(self):
+        for i in range(3):
+            Post.objects.create(author=self.author, title=f'More django {i}', content='django ' * (i + 1))
+        seen = []
+        titles, url = self.titles('django', page_size=2)
+        seen += titles
+        while url:
+            response = self.client.get(url)
+            seen += [post['title'] for post in response.data['results']]
+            url = response.data['next']
+        ranked = list(search.search(Post.objects.all(), 'django').order_by('-search_rank', '-id')
+                      .values_list('title', flat=True))
+        self.assertEqual(seen, ranked)
+        self.assertEqual(len(seen), 5)
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        self.assertEqual(self.titles('pasta')[0], ['Cooking'])
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.fan = User.objects.create_user(username='fan', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='x')
+        self.url = reverse('post-detail', args=[self.post.pk])
+        self.client.force_authenticate(self.fan)
+
+    def etag(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        return response['ETag']
+
+    def test_unchanged_post_is_not_modified(self):
+        etag = self.etag()
+        # The validators take one single-row query; nothing is serialized
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.etag(self.url + '?comments=all'), etag)
+
+    def test_malformed_pk_is_not_found(self):
+        url = self.url.replace(str(self.post.pk), 'abc')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"x"').status_code, 404)
+        self.assertEqual(self.client.patch(url, {'title': 'Hi'}, HTTP_IF_MATCH='"x"').status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_changes_outside_the_row_change_the_etag(self):
+        first = self.etag()
+        etags = {first}
+        self.client.post(reverse('like_post', args=[self.post.pk]))  # Counter bumped with F()
+        etags.add(self.etag())
+        Comment.objects.create(post=self.post, author=self.fan, content='First!')
+        etags.add(self.etag())
+        self.author.username = 'renamed'
+        self.author.save()
+        etags.add(self.etag())
+        self.assertEqual(len(etags), 4)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first).status_code, 200)
+
+    def test_if_match_guards_writes(self):
+        etag = self.etag()
+        response = self.client.patch(self.url, {'title': 'Edited'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        # A second writer still holding the old copy is turned away
+        response = self.client.patch(self.url, {'title': 'Clobbered'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.data['detail'].code, 'precondition_failed')
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=etag).status_code, 412)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Edited')
+        self.assertEqual(self.client.patch(self.url, {'title': 'Unconditional'}).status_code, 200)
+        self.assertEqual(self.client.get(reverse('post-detail', args=[999]), HTTP_IF_NONE_MATCH='"x"').status_code, 404)
+
+    def test_comments_and_profiles(self):
+        comment = Comment.objects.create(post=self.post, author=self.fan, content='Hi')
+        comment_url = reverse('comment-detail', args=[comment.pk])
+        etag = self.etag(comment_url)
+        self.assertEqual(self.client.get(comment_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        profile = self.etag(reverse('profile'))
+        self.assertEqual(self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=profile).status_code, 304)
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        self.assertEqual(self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=profile).status_code, 200)
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class StreamingResponseTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.author.followers.add(self.reader)
+        for i in range(5):
+            post = Post.objects.create(author=self.author, title=f'Post \u2028{i}', content='x')
+            Comment.objects.create(post=post, author=self.reader, content=f'On {i}')
+        self.client.force_authenticate(self.reader)
+
+    def test_user_feed_streams_the_same_json(self):
+        from accounts.views import UserFeedView
+        factory = APIRequestFactory()
+        request = factory.get('/feed/all/')
+        force_authenticate(request, self.reader)
+        response = UserFeedView.as_view()(request)
+        self.assertTrue(response.streaming)
+        # Posts with their authors, then the comment previews of each chunk of 2 posts
+        with self.assertNumQueries(4):
+            body = b''.join(response.streaming_content)
+        self.assertEqual(len(json.loads(body)), 5)
+        request = factory.get('/feed/all/', HTTP_ACCEPT='text/html')
+        force_authenticate(request, self.reader)
+        expected = UserFeedView.as_view()(request)
+        self.assertFalse(expected.streaming)
+        self.assertEqual(body, JSONRenderer().render(expected.data))
+
+    def test_feed_page_keeps_its_envelope(self):
+        response = self.client.get(reverse('feed'), {'page_size': 3})
+        self.assertTrue(response.streaming)
+        data = response_json(response)
+        self.assertEqual(list(data), ['message', 'following_count', 'next', 'posts'])
+        self.assertEqual(len(data['posts']), 3)
+        self.assertEqual(data['posts'][0]['comments'][0]['content'], 'On 4')
+        rest = response_json(self.client.get(data['next']))
+        self.assertEqual([post['title'] for post in rest['posts']], ['Post \u20281', 'Post \u20280'])
+        self.assertIsNone(rest['next'])
+
+
+class CompiledSerializerTests(QueryCountAssertionsMixin, APITestCase):
+    """Compiled serializers must render byte-for-byte what the ModelSerializers do."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user(username='ãuthor', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        for i in range(6):
+            post = Post.objects.create(author=self.author, title=f'Post \u2028{i}', content='x' * i, like_count=i)
+            for j in range(i):
+                Comment.objects.create(post=post, author=self.reader if j % 2 else self.author, content=f'{i}-{j} ✓')
+
+    def assertSameJSON(self, first, second):
+        self.assertEqual(JSONRenderer().render(first), JSONRenderer().render(second))
+
+    def test_post_and_comment_parity(self):
+        for serializer_class, model in ((PostSerializer, Post), (CommentSerializer, Comment)):
+            queryset = model.objects.order_by('-id')
+            expected = serializer_class(plan_queryset(queryset, serializer_class()), many=True).data
+            compiled = compile_serializer(serializer_class)
+            self.assertSameJSON(compiled.serialize(compiled.values(queryset)), expected)
+
+    def test_previews_are_one_query(self):
+        compiled = compile_serializer(PostSerializer)
+        with self.assertNumQueries(2):
+            data = compiled.serialize(compiled.values(Post.objects.order_by('id')))
+        self.assertEqual([len(post['comments']) for post in data], [0, 1, 2, 3, 3, 3])
+
+    def test_list_endpoints_match_the_plain_serializers(self):
+        post = Post.objects.order_by('-id').first()
+        urls = [
+            reverse('post-list') + '?page_size=4',
+            reverse('post-list') + '?search=post',
+            reverse('comment-list'),
+            reverse('post_comments', args=[post.pk]) + '?page_size=2',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                compiled = self.client.get(url)
+                with override_settings(COMPILED_SERIALIZERS=False):
+                    expected = self.client.get(url)
+                self.assertEqual(compiled.status_code, 200)
+                self.assertEqual(compiled.content, expected.content)
+                if compiled.data['next']:
+                    self.assertEqual(self.client.get(compiled.data['next']).content,
+                                     self.client.get(expected.data['next']).content)
+
+    def test_unsupported_fields_are_rejected(self):
+        class TitleLengthSerializer(serializers.ModelSerializer):
+            length = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Post
+                fields = ['id', 'length']
+
+            def get_length(self, post):
+                return len(post.title)
+
+        with self.assertRaises(ImproperlyConfigured):
+            CompiledSerializer(TitleLengthSerializer)
@@ -0,0 +1,201 @@
+"""
+Materialized home timelines (fan-out-on-write).
+
+When an author publishes, the post id is pushed into the timeline of every
+follower, so reading a feed is one indexed slice of `TimelineEntry` instead of
+`Post.objects.filter(author__in=following)` over the whole posts table.
+
+Authors with more than `TIMELINE_FANOUT_LIMIT` followers are not fanned out;
+their posts are pulled at read time and merged into the feed page instead.
+
+Timelines are capped at `TIMELINE_MAX_LENGTH` entries, give or take
+`TIMELINE_TRIM_SLACK`: fan-out counts each follower's entries in the default
+cache and trims a timeline (a bounded delete past its N-th entry) only once
+it has grown `TIMELINE_TRIM_SLACK` entries over the cap, so a post's write
+cost does not include scanning every follower's timeline.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from accounts import follow_graph
+from .models import Post, TimelineEntry
+
+
+def timeline_max_length():
+    return getattr(settings, 'TIMELINE_MAX_LENGTH', 800)
+
+
+def timeline_fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+
+
+def timeline_trim_slack():
+    return getattr(settings, 'TIMELINE_TRIM_SLACK', 50)
+
+
+LENGTH_KEY = 'timeline:length:{}'
+
+
+def follower_ids(author_id):
+    return list(follow_graph.follower_ids(author_id))
+
+
+def following_ids(user_id):
+    return list(follow_graph.following_ids(user_id))
+
+
+def high_fanout_author_ids(author_ids):
+    """Return the subset of `author_ids` whose posts are pulled at read time."""
+    limit = timeline_fanout_limit()
+    return {author_id for author_id, count in follow_graph.follower_counts(author_ids).items() if count > limit}
+
+
+def _before(position, id_field):
+    """Rows after the (created_at, id) feed position `position`, newest first."""
+    created_at, pk = position
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, **{f'{id_field}__lt': pk})
+
+
+def trim_timeline(user_id):
+    """Drop the entries beyond `TIMELINE_MAX_LENGTH` from one user's timeline."""
+    limit = timeline_max_length()
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    # The first entry past the cap, read through the (user, created_at, post) index
+    cutoff = list(entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[limit:limit + 1])
+    if not cutoff:
+        return 0
+    created_at, post_id = cutoff[0]
+    return entries.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lte=post_id)).delete()[0]
+
+
+def trim_timelines(user_ids):
+    """Drop entries beyond `TIMELINE_MAX_LENGTH` from the given users' timelines."""
+    trimmed = sum(trim_timeline(user_id) for user_id in user_ids)
+    forget_lengths(user_ids)
+    return trimmed
+
+
+def forget_lengths(user_ids):
+    cache.delete_many([LENGTH_KEY.format(user_id) for user_id in user_ids])
+
+
+def grow_timelines(user_ids, added=1):
+    """
+    Count `added` new entries in each timeline and trim the ones now more than
+    `TIMELINE_TRIM_SLACK` over the cap. Lengths missing from the cache are
+    counted once, in one grouped query.
+    """
+    keys = {user_id: LENGTH_KEY.format(user_id) for user_id in user_ids}
+    cached = cache.get_many(keys.values())
+    lengths = {user_id: cached[key] + added for user_id, key in keys.items() if key in cached}
+    missing = [user_id for user_id in user_ids if user_id not in lengths]
+    if missing:
+        # Counted after the insert, so the new entries are included
+        counted = dict(TimelineEntry.objects.filter(user_id__in=missing)
+                       .values('user_id').annotate(length=Count('id')).values_list('user_id', 'length'))
+        lengths.update({user_id: counted.get(user_id, 0) for user_id in missing})
+    overflowing = [user_id for user_id, length in lengths.items()
+                   if length > timeline_max_length() + timeline_trim_slack()]
+    for user_id in overflowing:
+        lengths[user_id] -= trim_timeline(user_id)
+    cache.set_many({keys[user_id]: length for user_id, length in lengths.items()}, None)
+    return len(overflowing)
+
+
+def fan_out_post(post):
+    """Push a new post into its author's followers' timelines."""
+    if high_fanout_author_ids([post.author_id]):
+        return 0
+    recipients = follower_ids(post.author_id)
+    if not recipients:
+        return 0
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post.pk, created_at=post.created_at) for user_id in recipients],
+        ignore_conflicts=True,
+    )
+    grow_timelines(recipients)
+    return len(recipients)
+
+
+def backfill_timeline(user_id, author_id):
+    """Copy an author's recent posts into a new follower's timeline."""
+    if high_fanout_author_ids([author_id]):
+        return 0
+    recent = (Post.objects.filter(author_id=author_id)
+              .order_by('-created_at', '-id')
+              .values_list('id', 'created_at')[:timeline_max_length()])
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at) for post_id, created_at in recent],
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+    return len(recent)
+
+
+def remove_author_from_timeline(user_id, author_id):
+    return remove_authors_from_timeline(user_id, [author_id])
+
+
+def remove_authors_from_timeline(user_id, author_ids):
+    forget_lengths([user_id])
+    return TimelineEntry.objects.filter(user_id=user_id, post__author_id__in=author_ids).delete()[0]
+
+
+def rebuild_timeline(user_id):
+    """Recompute one user's timeline from scratch from the posts table."""
+    authors = set(following_ids(user_id))
+    authors -= high_fanout_author_ids(authors)
+    forget_lengths([user_id])
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    if not authors:
+        return 0
+    recent = (Post.objects.filter(author_id__in=authors)
+              .order_by('-created_at', '-id')
+              .values_list('id', 'created_at')[:timeline_max_length()])
+    entries = TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at) for post_id, created_at in recent]
+    )
+    return len(entries)
+
+
+def home_timeline(user, following=None):
+    """
+    The user's whole home feed as a Post queryset, newest first.
+
+    `following` may be passed when the caller already holds the followed ids.
+    Paginated reads use `home_timeline_page`, which slices the index instead.
+    """
+    if following is None:
+        following = following_ids(user.pk)
+    condition = Q(id__in=TimelineEntry.objects.filter(user_id=user.pk).values('post_id'))
+    pulled = high_fanout_author_ids(following)
+    if pulled:
+        condition |= Q(author_id__in=pulled)
+    return Post.objects.filter(condition).order_by('-created_at', '-id')
+
+
+def home_timeline_page(user, size, after=None, following=None):
+    """
+    The next `size` posts of the user's home feed after the (created_at, id)
+    position `after` (from the start if None), newest first.
+
+    The page is cut from the user's `TimelineEntry` rows through the
+    (user, created_at, post) index; the newest `size` posts of pulled
+    high-fanout authors are read separately and merged in. Only the chosen
+    posts are then loaded.
+    """
+    if following is None:
+        following = following_ids(user.pk)
+    entries = TimelineEntry.objects.filter(user_id=user.pk)
+    if after is not None:
+        entries = entries.filter(_before(after, 'post_id'))
+    keys = list(entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:size])
+    pulled = high_fanout_author_ids(following)
+    if pulled:
+        posts = Post.objects.filter(author_id__in=pulled)
+        if after is not None:
+            posts = posts.filter(_before(after, 'id'))
+        keys += posts.order_by('-created_at', '-id').values_list('created_at', 'id')[:size]
+        keys = sorted(set(keys), reverse=True)[:size]
+    return Post.objects.filter(id__in=[post_id for _, post_id in keys]).order_by('-created_at', '-id')
@@ -3,88 +3,139 @@ from django.shortcuts import render
 # Create your views here.
 from rest_framework import viewsets, permissions
 from .models import Post, Comment
-from .serializers import PostSerializer, CommentSerializer
-from rest_framework import filters
+from .serializers import PostSerializer, PostDetailSerializer, CommentSerializer
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
 from rest_framework.response import Response
 from .models import Post, Like
-from notifications.models import Notification
+from notifications.dispatch import notify
 from rest_framework.views import APIView
-
-
-class PostViewSet(viewsets.ModelViewSet):
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from . import counters
+from .search import FullTextSearchFilter
+from .timeline import following_ids, home_timeline, home_timeline_page
+from social_media_api.compiled import CompiledListMixin
+from social_media_api.conditional import ConditionalResponseMixin
+from social_media_api.pagination import KeysetPagination
+from social_media_api.query_planner import QueryPlanMixin, plan_queryset
+from social_media_api.streaming import RESULTS, StreamingJSONResponse, wants_stream
+
+
+class PostViewSet(ConditionalResponseMixin, QueryPlanMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
+    etag_related = {get_user_model(): 'author_id'}
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['title', 'content']
-    search_fields = ['title', 'content']
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_fields = ['title']
+
+    def get_serializer_class(self):
+        # Lists embed a bounded comment preview; a single post may ask for all
+        if self.action == 'retrieve' and self.request.query_params.get('comments') == 'all':
+            return PostDetailSerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalResponseMixin, QueryPlanMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
+    etag_related = {get_user_model(): 'author_id'}
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        counters.adjust_comment_count(comment.post_id, 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        counters.adjust_comment_count(instance.post_id, -1)
+
+
+class PostCommentListView(QueryPlanMixin, CompiledListMixin, generics.ListAPIView):
+    """
+    Comments of one post, newest first, keyset-paginated.
+    """
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        post = generics.get_object_or_404(Post.objects.only('pk'), pk=self.kwargs['pk'])
+        return Comment.objects.filter(post=post)
 
 
 class LikePostView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'likes'
 
     def post(self, request, pk):
         post = generics.get_object_or_404(Post, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                counters.adjust_like_count(post.pk, 1)
+                # Notify the post author once the like is committed (written off the request path)
+                notify(post.author_id, request.user.pk, 'liked your post', post)
 
         if created:
-            # Create notification for the post author
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb='liked your post',
-                target=post
-            )
             return Response({"message": "Post liked."}, status=201)
         return Response({"message": "You already liked this post."}, status=400)
 
 
 class UnlikePostView(generics.DestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'likes'
 
     def delete(self, request, pk):
         post = generics.get_object_or_404(Post, pk=pk)
-        try:
-            like = Like.objects.get(user=request.user, post=post)
-            like.delete()
+        with transaction.atomic():
+            # Only the request that actually removed the row decrements the counter
+            deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted:
+                counters.adjust_like_count(post.pk, -1)
+        if deleted:
             return Response({"message": "Post unliked."}, status=204)
-        except Like.DoesNotExist:
-            return Response({"message": "You have not liked this post."}, status=400)
+        return Response({"message": "You have not liked this post."}, status=400)
 
 
 class FeedView(APIView):
     """
     View that generates a feed based on posts from users that the current user follows.
     Returns posts ordered by creation date with most recent posts at the top.
+    Posts are read from the user's materialized timeline (see posts/timeline.py).
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Get all users that the current user follows
-        following_users = request.user.following.all()
-        
-        # Filter posts from followed users and order by creation date (newest first)
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        
+        # Get the ids of all users that the current user follows
+        following = following_ids(request.user.pk)
+
+        # Read one page of the materialized timeline (newest first)
+        paginator = KeysetPagination()
+        posts = paginator.paginate_reader(
+            lambda limit, after: plan_queryset(
+                home_timeline_page(request.user, limit, after, following=following), PostSerializer()),
+            request, Post,
+            count=lambda: paginator.get_approximate_count(home_timeline(request.user, following=following)),
+        )
+
+        envelope = {'message': 'User feed', 'following_count': len(following)}
+        if wants_stream(request):
+            # Serialize and send the posts one at a time
+            payload = {**envelope, **paginator.get_paginated_data(RESULTS, results_key='posts')}
+            return StreamingJSONResponse(PostSerializer(), posts, payload)
+
         # Serialize the posts
         serializer = PostSerializer(posts, many=True)
-        
+
         return Response({
-            'message': 'User feed',
-            'following_count': following_users.count(),
-            'posts_count': posts.count(),
-            'posts': serializer.data
+            **envelope,
+            **paginator.get_paginated_data(serializer.data, results_key='posts')
         })
@@ -0,0 +1,262 @@
+"""
+Compiled read serializers for list endpoints.
+
+Rendering a page through a ModelSerializer builds a model instance per row,
+then walks every field's `get_attribute`/`to_representation` through DRF's
+generic machinery. `compile_serializer` reads a serializer class once and
+derives:
+
+* a flat `values()` fetch of exactly the columns its fields read (following
+  foreign keys with joins, e.g. `author__username`), and
+* a precomputed mapping from each fetched row to the output dict, which still
+  calls each field's own `to_representation`, so the output is identical.
+
+Nested list serializers over reverse foreign keys (post comments, an author's
+books) are compiled too and loaded with one more `values()` query per page,
+honouring a slice from `get_prefetch_queryset` (comment previews) with a
+window function. Related fields that need the object itself, such as a
+StringRelatedField over a generic foreign key, load those objects in bulk.
+Anything else (method fields, nested single objects, many-to-many) raises
+ImproperlyConfigured when the serializer is compiled.
+
+Views opt in with `CompiledListMixin`; `COMPILED_SERIALIZERS = False` turns
+every opted-in view back to the plain serializer.
+"""
+import functools
+
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import relations, serializers
+from rest_framework.fields import SkipField, empty
+from rest_framework.response import Response
+
+
+def _missing(field):
+    """What Field.get_attribute does when a nullable relation on the source path is None."""
+    if field.default is not empty:
+        return field.get_default()
+    if field.allow_null:
+        return None
+    if not field.required:
+        raise SkipField()
+    raise AttributeError(f'{field.field_name!r}: a relation on its source path is None')
+
+
+class _Value:
+    """A column, possibly across foreign keys; also primary keys of related objects."""
+    load = None
+
+    def __init__(self, field, path, hops=(), pk_only=False):
+        self.field, self.path, self.hops, self.pk_only = field, path, list(hops), pk_only
+        self.paths = [path, *self.hops]
+
+    def value(self, row, loaded):
+        if any(row[hop] is None for hop in self.hops):
+            return _missing(self.field)
+        value = row[self.path]
+        if value is None:
+            return None
+        if self.pk_only:
+            value = relations.PKOnlyObject(pk=value)
+        return self.field.to_representation(value)
+
+
+class _Object:
+    """A related field that renders the related object itself, loaded in bulk."""
+
+    def __init__(self, field, path, model, hops=()):
+        self.field, self.path, self.model, self.hops = field, path, model, list(hops)
+        self.paths = [path, *self.hops]
+
+    def load(self, rows):
+        return self.model._default_manager.in_bulk({row[self.path] for row in rows} - {None})
+
+    def value(self, row, loaded):
+        if any(row[hop] is None for hop in self.hops):
+            return _missing(self.field)
+        instance = loaded.get(row[self.path])
+        return None if instance is None else self.field.to_representation(instance)
+
+
+class _GenericObject:
+    """A related field over a GenericForeignKey: objects loaded per content type."""
+
+    def __init__(self, field, generic):
+        self.field = field
+        self.paths = [generic.ct_field, generic.fk_field]
+
+    def load(self, rows):
+        ct_field, fk_field = self.paths
+        ids = {}
+        for row in rows:
+            if row[ct_field] is not None:
+                ids.setdefault(row[ct_field], set()).add(row[fk_field])
+        objects = {}
+        for content_type_id, pks in ids.items():
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            for instance in content_type.get_all_objects_for_this_type(pk__in=pks):
+                objects[content_type_id, instance.pk] = instance
+        return objects
+
+    def value(self, row, loaded):
+        instance = loaded.get((row[self.paths[0]], row[self.paths[1]]))
+        return None if instance is None else self.field.to_representation(instance)
+
+
+class _Nested:
+    """A nested list serializer over a reverse foreign key, one query per page."""
+
+    def __init__(self, field, relation, model):
+        self.field = field
+        self.pk = model._meta.pk.name
+        self.paths = [self.pk]
+        self.foreign_key = relation.field.name
+        self.child = CompiledSerializer(field.child, extra=[self.foreign_key])
+
+    def children(self, parent_ids):
+        model = self.child.model
+        queryset = model._default_manager.all()
+        if hasattr(self.field, 'get_prefetch_queryset'):
+            queryset = self.field.get_prefetch_queryset(queryset)
+        ordering = list(queryset.query.order_by or model._meta.ordering or ['pk'])
+        if queryset.query.is_sliced:
+            # The same slice for every parent: number each parent's rows instead
+            low, high = queryset.query.low_mark, queryset.query.high_mark
+            queryset = queryset.all()
+            queryset.query.clear_limits()
+            queryset = queryset.filter(**{f'{self.foreign_key}__in': parent_ids}).annotate(
+                compiled_position=Window(RowNumber(), partition_by=F(self.foreign_key), order_by=ordering),
+            ).filter(compiled_position__gt=low)
+            if high is not None:
+                queryset = queryset.filter(compiled_position__lte=high)
+        else:
+            queryset = queryset.filter(**{f'{self.foreign_key}__in': parent_ids})
+        return self.child.values(queryset.order_by(*ordering), annotations=False)
+
+    def load(self, rows):
+        grouped = {row[self.pk]: [] for row in rows}
+        if grouped:
+            children = list(self.children(list(grouped)))
+            for child, data in zip(children, self.child.serialize(children)):
+                grouped[child[self.foreign_key]].append(data)
+        return grouped
+
+    def value(self, row, loaded):
+        return loaded[row[self.pk]]
+
+
+def _compile_field(field, model):
+    if isinstance(field, serializers.ListSerializer):
+        try:
+            relation = model._meta.get_field(field.source) if len(field.source_attrs) == 1 else None
+        except FieldDoesNotExist:
+            relation = None
+        if relation is not None and relation.one_to_many and isinstance(field.child, serializers.ModelSerializer):
+            return _Nested(field, relation, model)
+    elif not isinstance(field, (serializers.BaseSerializer, relations.ManyRelatedField)) and field.source != '*':
+        current, path, hops = model, [], []
+        for index, attr in enumerate(field.source_attrs):
+            is_last = index == len(field.source_attrs) - 1
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break  # A property or method: needs the instance
+            path.append(attr)
+            lookup = '__'.join(path)
+            if isinstance(model_field, GenericForeignKey):
+                if is_last and isinstance(field, relations.RelatedField) and not path[:-1]:
+                    return _GenericObject(field, model_field)
+                break
+            if not model_field.is_relation:
+                if is_last:
+                    return _Value(field, lookup, hops)
+                break
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                break
+            if is_last:
+                if isinstance(field, relations.RelatedField):
+                    if field.use_pk_only_optimization():
+                        return _Value(field, lookup, hops, pk_only=True)
+                    return _Object(field, lookup, model_field.related_model, hops)
+                break
+            if model_field.null:
+                hops.append(lookup)
+            current = model_field.related_model
+    raise ImproperlyConfigured(
+        f'Cannot compile {type(field).__name__} {field.field_name!r} of {model.__name__}: it needs model instances'
+    )
+
+
+class CompiledSerializer:
+    """
+    The read side of a ModelSerializer as a `values()` fetch plus a row
+    mapping. `serialize(compiled.values(queryset))` returns the same list as
+    `Serializer(queryset, many=True).data`.
+    """
+
+    def __init__(self, serializer, extra=()):
+        if isinstance(serializer, type):
+            serializer = serializer()
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        self.model = serializer.Meta.model
+        self.fields = [(field.field_name, _compile_field(field, self.model)) for field in serializer._readable_fields]
+        # The pk by name: selecting both `pk` and `id` breaks window-filtered queries
+        paths = [self.model._meta.pk.name, *extra]
+        for _, compiled in self.fields:
+            paths += compiled.paths
+        self.paths = list(dict.fromkeys(paths))
+
+    def values(self, queryset, annotations=True):
+        """
+        `queryset` as rows of the columns this serializer reads. Annotations
+        are kept too, so keyset pagination can still order and build cursors
+        on e.g. `search_rank`.
+        """
+        names = list(queryset.query.annotations) if annotations else []
+        return queryset.prefetch_related(None).values(*self.paths, *(name for name in names if name not in self.paths))
+
+    def serialize(self, rows):
+        rows = list(rows)
+        loaded = {name: compiled.load(rows) for name, compiled in self.fields if compiled.load}
+        data = []
+        for row in rows:
+            item = {}
+            for name, compiled in self.fields:
+                try:
+                    item[name] = compiled.value(row, loaded.get(name))
+                except SkipField:
+                    pass
+            data.append(item)
+        return data
+
+
+@functools.lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
+
+
+def compiled_serializers_enabled():
+    return getattr(settings, 'COMPILED_SERIALIZERS', True)
+
+
+class CompiledListMixin:
+    """
+    Serve a generic view's `list` through the compiled form of its serializer
+    class. Only the read path changes; pagination must accept rows as dicts
+    (KeysetPagination does).
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not compiled_serializers_enabled():
+            return super().list(request, *args, **kwargs)
+        compiled = compile_serializer(self.get_serializer_class())
+        rows = compiled.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(rows))
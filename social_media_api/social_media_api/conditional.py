@@ -0,0 +1,167 @@
+"""
+Conditional requests for detail endpoints: ETag, Last-Modified, 304 and 412.
+
+`ConditionalResponseMixin` answers `If-None-Match` / `If-Modified-Since` on
+GET and HEAD with 304 Not Modified, and `If-Match` / `If-Unmodified-Since` on
+PUT, PATCH and DELETE with 412 Precondition Failed when the client's copy is
+out of date (optimistic concurrency). Validators are computed without loading
+or serializing the object: one single-row query for its `updated_at` (and the
+ids of related objects it embeds) plus a cache lookup.
+
+Not every change to a representation moves `updated_at`: like and comment
+counters are bumped with UPDATE ... F(), comment previews change when
+comments do, and embedded authors can be renamed. Those changes `touch()` the
+object instead, recording when it last changed in the default cache (see the
+posts and accounts signals). The ETag covers `updated_at`, the touch times of
+the object and of the related objects it embeds, the query string and the
+response format; Last-Modified is the latest of those times.
+
+Touch times live in the default cache. If an entry is evicted it restarts at
+the current time, which only costs clients one full response. When several
+processes serve the API the default cache must be shared between them
+(Memcached, Redis, database), or a change made in one process goes unnoticed
+in the others.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+TOUCH_KEY = 'conditional:{}:{}'
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has changed since you last fetched it.'
+    default_code = 'precondition_failed'
+
+
+def _key(model, pk):
+    return TOUCH_KEY.format(model._meta.label_lower, pk)
+
+
+def touch(model, *pks):
+    """Record that the representation of these objects changed just now."""
+    if not pks:
+        return
+
+    def record():
+        cache.set_many({_key(model, pk): time.time() for pk in pks}, None)
+
+    record()
+    # Again after commit, in case a request read the old rows and the new time meanwhile
+    transaction.on_commit(record)
+
+
+def touched_at(keys):
+    """Touch times for `keys`, starting the clock for keys never touched (or evicted)."""
+    times = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in times}
+    if missing:
+        for key, value in missing.items():
+            if not cache.add(key, value, None):
+                value = cache.get(key, value)
+            times[key] = value
+    return times
+
+
+class ConditionalResponseMixin:
+    """
+    Detail views (retrieve/update/destroy) with ETag and Last-Modified.
+
+    `etag_timestamp_field` names the model's modification timestamp (None if
+    it has none); `etag_related` maps models embedded in the representation to
+    the field holding their id, e.g. `{CustomUser: 'author_id'}`.
+    """
+    etag_timestamp_field = 'updated_at'
+    etag_related = {}
+
+    def get_etag_object_id(self):
+        return self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+
+    def get_etag_object_pk(self):
+        """The object id as the pk field's Python value, or None if it cannot be one (e.g. /posts/abc/)."""
+        try:
+            return self.get_queryset().model._meta.pk.to_python(self.get_etag_object_id())
+        except ValidationError:
+            return None
+
+    def get_validators(self):
+        """(etag, last modified as a Unix time), or (None, None) if the object does not exist."""
+        model = self.get_queryset().model
+        pk = self.get_etag_object_pk()
+        if pk is None:
+            return None, None
+        fields = [field for field in [self.etag_timestamp_field, *self.etag_related.values()] if field]
+        row = ()
+        if fields:
+            row = self.get_queryset().filter(pk=pk).values_list(*fields).first()
+            if row is None:
+                return None, None
+        values = dict(zip(fields, row))
+        keys = [_key(model, pk)] + [_key(related, values[field]) for related, field in self.etag_related.items()]
+        times = touched_at(keys)
+        last_modified = max(times.values())
+        timestamp = values.get(self.etag_timestamp_field)
+        if timestamp is not None:
+            last_modified = max(last_modified, timestamp.timestamp())
+        variant = (self.request.accepted_media_type, sorted(self.request.query_params.lists()))
+        state = repr((model._meta.label_lower, pk, timestamp, [times[key] for key in keys], variant))
+        return quote_etag(hashlib.md5(state.encode()).hexdigest()), int(last_modified)
+
+    def check_preconditions(self):
+        """
+        Returns a 304 Response if the client's copy is current, raises
+        PreconditionFailed if a write was based on a stale copy, else returns
+        None. Sets `self.validators` either way.
+        """
+        self.validators = etag, last_modified = self.get_validators()
+        if etag is None:
+            return None  # Missing or malformed id: let the view answer 404
+        response = get_conditional_response(self.request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            return None
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            return self.add_validators(Response(status=status.HTTP_304_NOT_MODIFIED))
+        raise PreconditionFailed()
+
+    def add_validators(self, response, validators=None):
+        etag, last_modified = validators or self.validators
+        if etag is not None:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def lock_object(self):
+        # Keeps other writers out between the precondition check and the write
+        pk = self.get_etag_object_pk()
+        if pk is not None:
+            list(self.get_queryset().select_for_update().filter(pk=pk).values_list('pk'))
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified = self.check_preconditions()
+        if not_modified is not None:
+            return not_modified
+        return self.add_validators(super().retrieve(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            self.lock_object()
+            self.check_preconditions()
+            response = super().update(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.add_validators(response, self.get_validators())
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            self.lock_object()
+            self.check_preconditions()
+            return super().destroy(request, *args, **kwargs)
@@ -0,0 +1,197 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are addressed by an opaque cursor holding the ordering values of the last
+row served, so page N is a `WHERE (created_at, id) < (...)  LIMIT n` index
+range read instead of an OFFSET scan. No COUNT(*) is issued unless the client
+asks for `?include_total=true`, in which case an approximate total is returned.
+
+Querysets annotated with a `search_rank` relevance score (posts/search.py) are
+paged by score instead, most relevant first.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'include_total'
+    total_count_limit = 10000  # Bounded COUNT used where no planner estimate exists
+    invalid_cursor_message = 'Invalid cursor'
+    rank_annotation = 'search_rank'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.approximate_count = None
+        if request.query_params.get(self.total_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.approximate_count = self.get_approximate_count(queryset)
+
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def paginate_reader(self, read, request, model, count=None):
+        """
+        Paginate rows that are not one queryset: `read(limit, position)` returns
+        up to `limit` rows after the decoded cursor `position` (None for the
+        first page) in `ordering`. `count()` answers `?include_total=true`.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.approximate_count = None
+        if count is not None and request.query_params.get(self.total_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.approximate_count = count()
+        self.ordering = type(self).ordering
+        rows = list(read(self.page_size + 1, self.decode_cursor(request, model)))
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_ordering(self, queryset):
+        if self.rank_annotation in queryset.query.annotations:
+            return (f'-{self.rank_annotation}', '-id')
+        return type(self).ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_position_filter(self, position):
+        """Lexicographic "after this row" filter for the configured ordering."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, instance):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            # Rows from a compiled serializer's values() fetch are dicts
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps(values, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        return self.parse_cursor(encoded, model)
+
+    def parse_cursor(self, encoded, model):
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            # Only scalars: None or nested JSON would reach the position filter and fail there
+            if any(isinstance(value, bool) or not isinstance(value, (str, int, float)) for value in values):
+                raise ValueError
+            return [
+                float(value) if field.lstrip('-') == self.rank_annotation
+                else model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_approximate_count(self, queryset):
+        """
+        PostgreSQL: the planner's row estimate (no scan). Elsewhere: a COUNT
+        capped at `total_count_limit` rows.
+        """
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        return queryset[:self.total_count_limit].count()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_data(self, data, results_key='results'):
+        payload = {'next': self.get_next_link()}
+        if self.approximate_count is not None:
+            payload['approximate_count'] = self.approximate_count
+        payload[results_key] = data
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'approximate_count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class TimestampKeysetPagination(KeysetPagination):
+    """
+    Pages also carry `since`, the cursor of their newest row. Kept from the
+    first page a client reads, it bounds "what I have seen" from above.
+    """
+    ordering = ('-timestamp', '-id')
+
+    def get_paginated_data(self, data, results_key='results'):
+        payload = super().get_paginated_data(data, results_key)
+        payload['since'] = self.encode_cursor(self.page[0]) if self.page else None
+        return payload
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['since'] = {'type': 'string', 'nullable': True}
+        return response_schema
+
+    def get_seen_filter(self, since):
+        """Rows at or older than the position `since`, the complement of "newer than it"."""
+        timestamp, pk = since
+        return self.get_position_filter(since) | Q(timestamp=timestamp, id=pk)
+
+
+class IdKeysetPagination(KeysetPagination):
+    ordering = ('-id',)
@@ -0,0 +1,96 @@
+"""
+Serializer-driven query planning.
+
+`plan_queryset` walks a serializer's readable fields and adds the
+`select_related`/`prefetch_related` calls needed to render them, so list
+responses cost a fixed number of queries instead of 1 + N (+ N*M for nested
+lists). Views opt in with `QueryPlanMixin`.
+"""
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import relations, serializers
+
+
+def _reads_pk_only(field):
+    # PrimaryKeyRelatedField reads `<fk>_id` straight off the row.
+    if isinstance(field, relations.ManyRelatedField):
+        field = field.child_relation
+    return isinstance(field, relations.RelatedField) and field.use_pk_only_optimization()
+
+
+def _plan(serializer, model, prefix):
+    select, prefetch = set(), []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if isinstance(field, serializers.Serializer):
+                nested_select, nested_prefetch = _plan(field, model, prefix)
+                select |= nested_select
+                prefetch += nested_prefetch
+            continue
+
+        current, path = model, []
+        attrs = field.source_attrs
+        for index, attr in enumerate(attrs):
+            is_last = index == len(attrs) - 1
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            lookup = prefix + '__'.join(path + [attr])
+            if isinstance(model_field, GenericForeignKey):
+                prefetch.append(lookup)
+                break
+            if not model_field.is_relation:
+                break
+            if model_field.many_to_one or model_field.one_to_one:
+                if is_last and _reads_pk_only(field):
+                    break
+                path.append(attr)
+                current = model_field.related_model
+                if is_last and isinstance(field, serializers.Serializer):
+                    nested_select, nested_prefetch = _plan(field, current, lookup + '__')
+                    select |= nested_select
+                    prefetch += nested_prefetch
+                continue
+            # To-many relation: a separate prefetch query, planned recursively
+            # for nested serializers. A list serializer may narrow it further
+            # (e.g. slice to a preview) through `get_prefetch_queryset`, storing
+            # the result on `prefetch_to_attr`.
+            if is_last and isinstance(field, serializers.ListSerializer):
+                child_queryset = plan_queryset(model_field.related_model._default_manager.all(), field.child)
+                if hasattr(field, 'get_prefetch_queryset'):
+                    child_queryset = field.get_prefetch_queryset(child_queryset)
+                to_attr = getattr(field, 'prefetch_to_attr', None)
+                prefetch.append(Prefetch(lookup, queryset=child_queryset, to_attr=to_attr))
+            else:
+                prefetch.append(lookup)
+            break
+        if path:
+            select.add(prefix + '__'.join(path))
+    return select, prefetch
+
+
+def plan_queryset(queryset, serializer):
+    """Return `queryset` with the joins and prefetches `serializer` will read."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    select, prefetch = _plan(serializer, queryset.model, '')
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Apply `plan_queryset` to a generic view's queryset for its serializer.
+
+    Hooks `filter_queryset` so it also covers views that override `get_queryset`.
+    """
+
+    def filter_queryset(self, queryset):
+        return plan_queryset(super().filter_queryset(queryset), self.get_serializer())
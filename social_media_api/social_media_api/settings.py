@@ -57,14 +57,68 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Applies to views that set `throttle_scope` (social_media_api/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'social_media_api.throttling.SlidingWindowThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'register': '5/hour',  # Per client IP
+        'login': '10/min',  # Per client IP
+        'likes': '60/min',
+        'follows': '30/min',
+        'bulk_follows': '10/hour',
+    },
+}
+THROTTLE_STORE = 'local'  # Per-process counters; or a CACHES alias to share them
+
+# API tokens (accounts/tokens.py): stored hashed, expire, purged by purge_expired_tokens
+AUTH_TOKEN_LIFETIME = 14 * 24 * 3600  # Seconds a token is valid after it is issued
+AUTH_TOKEN_MAX_PER_USER = 10  # Oldest live tokens are revoked beyond this
+
+# Token lookup cache (accounts/authentication.py), per process
+TOKEN_AUTH_CACHE_TTL = 60  # Seconds a revoked token may stay valid in other processes
+TOKEN_AUTH_CACHE_SIZE = 10000  # Least recently used tokens are evicted beyond this
+
+# Home timelines (posts/timeline.py)
+TIMELINE_MAX_LENGTH = 800  # Newest entries kept per user timeline
+TIMELINE_FANOUT_LIMIT = 5000  # Authors with more followers are pulled at read time
+TIMELINE_TRIM_SLACK = 50  # Entries a timeline may grow past the cap before fan-out trims it
+
+# Follow graph cache (accounts/follow_graph.py)
+FOLLOW_GRAPH_CACHE_TTL = 600  # Seconds; entries are also invalidated on follow/unfollow
+FOLLOW_GRAPH_MAX_CACHED_IDS = 10000  # Larger id sets are read from the database
+BULK_FOLLOW_MAX_IDS = 1000  # Targets accepted per bulk follow/unfollow request
+
+# Notification delivery (notifications/dispatch.py): writes happen after commit
+# on a local worker pool; use notifications.dispatch.SyncDispatcher to write inline.
+NOTIFICATIONS_DISPATCHER = {
+    'BACKEND': 'notifications.dispatch.ThreadedDispatcher',
+    'OPTIONS': {
+        'workers': 2,
+        'batch_size': 100,  # Notifications per bulk_create
+        'flush_interval': 0.05,  # Seconds a worker waits for a batch to fill
+    },
 }
+NOTIFICATIONS_COALESCE_WINDOW = 3600  # Seconds; merge repeats into one unread row (0 disables)
+NOTIFICATIONS_RECENT_ACTORS = 3  # Actor ids kept on a coalesced notification
+NOTIFICATIONS_RETENTION_DAYS = 90  # Read notifications older than this are archived
+NOTIFICATIONS_ARCHIVE_DIR = BASE_DIR / 'archive'  # gzip JSONL archives (notifications/retention.py)
+
+# Latest comments embedded per post in list responses (posts/serializers.py)
+COMMENT_PREVIEW_SIZE = 3
+
+# Rows fetched and serialized per chunk by streamed list responses (social_media_api/streaming.py)
+STREAM_CHUNK_SIZE = 500
+
+# Serve opted-in list endpoints through compiled values() serializers (social_media_api/compiled.py)
+COMPILED_SERIALIZERS = True
 
 
 MIDDLEWARE = [
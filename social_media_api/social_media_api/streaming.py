@@ -0,0 +1,93 @@
+"""
+Streaming JSON for large list responses.
+
+Returning `Response(serializer.data)` for a whole feed holds every model
+instance, every serialized dict and finally the rendered bytes in memory at
+once. `StreamingJSONResponse` instead reads rows with
+`queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)` (prefetches run per chunk),
+serializes them one at a time and sends each encoded chunk as soon as it is
+ready, so memory stays bounded by the chunk size however long the list is.
+
+The bytes match what JSONRenderer would have produced for the same data,
+including an envelope around the list (pagination links, counts, ...): put
+`RESULTS` where the list goes. Only JSON is streamed; views keep the normal
+Response for other renderers such as the browsable API (`wants_stream`).
+The status is sent before the rows are read, so an error halfway through
+truncates the body instead of turning into a 500.
+"""
+import json
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+RESULTS = object()  # Placeholder for the streamed list inside an envelope
+
+
+def default_chunk_size():
+    return getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+
+
+def wants_stream(request):
+    return type(request.accepted_renderer) is JSONRenderer
+
+
+def dumps(value):
+    """Encode like DRF's JSONRenderer (compact, unicode, strict floats)."""
+    encoded = json.dumps(
+        value, cls=encoders.JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS,
+    )
+    # Valid JSON, but not valid JavaScript; JSONRenderer escapes them too
+    return encoded.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def iter_list(serializer, rows, size):
+    """Yield the JSON array of `rows` serialized by `serializer`, `size` rows per piece."""
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    if isinstance(rows, QuerySet):
+        rows = rows.iterator(chunk_size=size)
+    separator = (SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS)[0]
+    yield '['
+    pending, started = [], False
+    for instance in rows:
+        pending.append(dumps(serializer.to_representation(instance)))
+        if len(pending) >= size:
+            yield (separator if started else '') + separator.join(pending)
+            pending, started = [], True
+    if pending:
+        yield (separator if started else '') + separator.join(pending)
+    yield ']'
+
+
+def iter_json(payload, serializer, rows, size):
+    if payload is RESULTS:
+        yield from iter_list(serializer, rows, size)
+        return
+    item_separator, key_separator = SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS
+    yield '{'
+    for index, (key, value) in enumerate(payload.items()):
+        yield (item_separator if index else '') + dumps(key) + key_separator
+        if value is RESULTS:
+            yield from iter_list(serializer, rows, size)
+        else:
+            yield dumps(value)
+    yield '}'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    `rows` (a queryset or a list) serialized by `serializer`, either as a bare
+    list or at the `RESULTS` placeholder of the dict `payload`.
+    """
+
+    def __init__(self, serializer, rows, payload=RESULTS, chunk_size=None, status=200):
+        super().__init__(iter_json(payload, serializer, rows, chunk_size or default_chunk_size()), status=status,
+                         content_type='application/json')
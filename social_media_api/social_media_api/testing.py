@@ -0,0 +1,46 @@
+"""
+Test helpers shared by the app test suites.
+"""
+import base64
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """Assertions for locking in a fixed number of queries per request."""
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context.captured_queries)
+
+    def assertMaxQueries(self, limit, func, *args, **kwargs):
+        executed = self.count_queries(func, *args, **kwargs)
+        self.assertLessEqual(executed, limit, f'{executed} queries executed, expected at most {limit}')
+
+    def assertConstantQueries(self, func, grow, rounds=2):
+        """
+        Call `func`, then `grow()` (which should add more rows to the page) and
+        `func` again, `rounds` times; fail if the query count changes.
+        """
+        baseline = self.count_queries(func)
+        for _ in range(rounds):
+            grow()
+            executed = self.count_queries(func)
+            self.assertEqual(executed, baseline, f'query count grew from {baseline} to {executed}')
+        return baseline
+
+
+def response_json(response):
+    """The decoded body of a buffered or streamed (social_media_api/streaming.py) JSON response."""
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return response.data
+
+
+def malformed_cursors(length):
+    """Well-encoded cursors of `length` values that no page can start after."""
+    shapes = [[None] * length, [[1]] * length, [{'id': 1}] * length, [True] * length]
+    return [base64.urlsafe_b64encode(json.dumps(shape).encode()).decode().rstrip('=') for shape in shapes]
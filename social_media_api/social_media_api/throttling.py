@@ -0,0 +1,158 @@
+"""
+Sliding-window rate limiting for the write-heavy endpoints.
+
+Views opt in by setting `throttle_scope`; the rate for the scope comes from
+`REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']` ('30/min', '5/hour', ...) and the
+limit applies per user, or per client IP for anonymous requests. Views without
+a scope are not throttled.
+
+DRF's built-in throttles keep a list of request timestamps per key in the
+cache and rewrite it on every request. `SlidingWindowThrottle` instead keeps two
+counters per key (this window and the previous one) and estimates the number of
+requests in the last `duration` seconds as
+
+    previous * (1 - elapsed / duration) + current
+
+which is O(1) per request. Counters live in process memory by default
+(`THROTTLE_STORE = 'local'`); set it to a cache alias to share them between
+processes through that cache.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle
+
+
+def _estimate(previous, current, limit, duration, now):
+    """Return (allowed, seconds to wait) for one more request in the window."""
+    elapsed = now % duration
+    weight = 1 - elapsed / duration
+    if previous * weight + current + 1 <= limit:
+        return True, 0.0
+    if current + 1 > limit:
+        return False, duration - elapsed
+    # Wait until the previous window's share has decayed enough
+    needed = 1 - (limit - current - 1) / previous
+    return False, max(needed * duration - elapsed, 0.0)
+
+
+class LocalWindowStore:
+    """Per-process counters: key -> [window index, current, previous]."""
+
+    sweep_every = 10000  # Hits between scans for idle keys
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key, limit, duration, now):
+        window = int(now // duration)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = [window, 0, 0]
+            elif counter[0] != window:
+                counter[2] = counter[1] if counter[0] == window - 1 else 0
+                counter[1] = 0
+                counter[0] = window
+            allowed, wait = _estimate(counter[2], counter[1], limit, duration, now)
+            if allowed:
+                counter[1] += 1
+            self._hits += 1
+            if self._hits >= self.sweep_every:
+                self._sweep(window)
+        return allowed, wait
+
+    def _sweep(self, window):
+        # Keys idle for two windows carry no weight any more; window lengths
+        # differ per scope, so only drop counters that are clearly stale.
+        self._hits = 0
+        stale = [key for key, counter in self._counters.items() if counter[0] < window - 1]
+        for key in stale:
+            del self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._hits = 0
+
+
+class CacheWindowStore:
+    """Counters in a Django cache, shared by every process using it."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def hit(self, key, limit, duration, now):
+        window = int(now // duration)
+        current_key, previous_key = f'{key}:{window}', f'{key}:{window - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        allowed, wait = _estimate(counts.get(previous_key, 0), counts.get(current_key, 0), limit, duration, now)
+        if allowed:
+            # Check and increment are not atomic; concurrent requests may overshoot slightly
+            self.cache.add(current_key, 0, duration * 2)
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, duration * 2)
+        return allowed, wait
+
+    def clear(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                alias = getattr(settings, 'THROTTLE_STORE', 'local')
+                _store = LocalWindowStore() if alias == 'local' else CacheWindowStore(alias)
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting == 'THROTTLE_STORE':
+        _store = None
+
+
+class SlidingWindowThrottle(ScopedRateThrottle):
+    timer = time.time
+
+    def get_rate(self):
+        # Read the rates on each request so settings overrides take effect
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        self.wait_seconds = None
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_seconds = get_store().hit(self.key, self.num_requests, self.duration, self.timer())
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds